@@ -1,27 +1,113 @@
 """ESPuino Integration."""
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
+
+from .catalog import async_get_catalog
+from .const import (
+    DOMAIN,
+    CONF_DEVICE_NAME,
+    CONF_ENTITY_PROFILE,
+    DEFAULT_ENTITY_PROFILE,
+    PROFILE_LEAN,
+    LEAN_PROFILE_OMITTED,
+    CONF_DEFER_PLATFORMS,
+    DEFAULT_DEFER_PLATFORMS,
+    DATA_PROFILER,
+)
+from .hub import EspuinoHub
+from .services import async_setup_services
 
 # PLATFORMS = ["sensor", "button", "switch", "number", "select", "binary_sensor", "text"] # Füge hier neue Plattformen hinzu
 # Lade nur Plattformen, für die auch .py Dateien existieren.
 PLATFORMS = ["sensor", "media_player", "button", "switch", "number", "binary_sensor"]
+# Mit CONF_DEFER_PLATFORMS werden nur diese sofort geladen, der Rest nach dem HA-Start
+CORE_PLATFORMS = ["media_player", "binary_sensor"]
+DEFERRED_PLATFORMS = [platform for platform in PLATFORMS if platform not in CORE_PLATFORMS]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the integration-wide parts (card catalog, services)."""
+    await async_get_catalog(hass)
+    async_setup_services(hass)
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up ESPuino from a config entry."""
-    # Speichere die Entry-Daten zentral, falls von Plattformen benötigt, die nicht direkt die Entry bekommen
-    # hass.data.setdefault(DOMAIN, {})[entry.entry_id] = entry.data
+    # Gemeinsame Laufzeitdaten des Geräts zentral ablegen, die Plattformen holen sie über die entry_id
+    hub = EspuinoHub(hass, entry)
+    await hub.async_setup()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
+
+    if hub.entity_profile == PROFILE_LEAN:
+        _async_remove_omitted_entities(hass, entry)
 
     # Forward setup to all platforms.
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    if not entry.options.get(CONF_DEFER_PLATFORMS, DEFAULT_DEFER_PLATFORMS):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        hub.platforms.extend(PLATFORMS)
+        await hub.async_start()
+    else:
+        # Player und Status sofort, Sensoren & Co. erst, wenn HA gestartet ist
+        await hass.config_entries.async_forward_entry_setups(entry, CORE_PLATFORMS)
+        hub.platforms.extend(CORE_PLATFORMS)
+        await hub.async_start()
+
+        @callback
+        def _async_started(_hass: HomeAssistant) -> None:
+            entry.async_create_background_task(
+                hass, _async_forward_deferred(hass, entry, hub), f"{DOMAIN} deferred platforms"
+            )
+
+        entry.async_on_unload(async_at_started(hass, _async_started))
+
+    # Geänderte Optionen werden im laufenden Betrieb übernommen, ohne die Entitäten neu aufzubauen
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload components in reverse order of setup or as defined in PLATFORMS
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    # Nur die Plattformen entladen, die tatsächlich geladen wurden (verzögertes Laden)
+    hub = hass.data[DOMAIN][entry.entry_id]
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, hub.platforms)
 
-    # if unload_ok:
-    # hass.data[DOMAIN].pop(entry.entry_id) # Entferne die Daten, falls gespeichert
+    if unload_ok:
+        hass.data[DOMAIN].pop(entry.entry_id) # Entferne die Laufzeitdaten des Geräts
+        if not hass.data[DOMAIN] and (profiler := hass.data.get(DATA_PROFILER)) is not None:
+            profiler.async_cancel() # Ohne Hubs gibt es nichts mehr zu messen
 
     return unload_ok
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options in place, a changed entity profile needs a reload."""
+    hub = hass.data[DOMAIN][entry.entry_id]
+    if hub.entity_profile != entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    await hub.async_update_options()
+
+async def _async_forward_deferred(hass: HomeAssistant, entry: ConfigEntry, hub: EspuinoHub) -> None:
+    """Set up the platforms that were held back until Home Assistant started."""
+    # Nach abgeschlossenem Setup darf nur mit dem Setup-Lock weitergeleitet werden
+    async with entry.setup_lock:
+        if entry.state is not ConfigEntryState.LOADED:
+            return # Inzwischen entladen
+        await hass.config_entries.async_forward_entry_setups(entry, DEFERRED_PLATFORMS)
+        hub.platforms.extend(DEFERRED_PLATFORMS)
+
+def _async_remove_omitted_entities(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the registry entries of entities the lean profile does not create.
+
+    Switching back to the full profile creates them again.
+    """
+    registry = er.async_get(hass)
+    device_name = entry.data[CONF_DEVICE_NAME]
+    for platform, key in LEAN_PROFILE_OMITTED:
+        entity_id = registry.async_get_entity_id(platform, DOMAIN, f"{device_name}_{key}")
+        if entity_id is not None:
+            registry.async_remove(entity_id)
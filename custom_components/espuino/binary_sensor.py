@@ -8,10 +8,11 @@ from homeassistant.components.binary_sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.const import EntityCategory
 
-from .const import STATE_SUFFIX_ONLINE_STATE, PAYLOAD_ONLINE, PAYLOAD_OFFLINE
+from .const import STATE_SUFFIX_ONLINE_STATE, PAYLOAD_ONLINE, PAYLOAD_OFFLINE, SIGNAL_UNSTABLE
 from .entity import EspuinoMqttEntity
 
 _LOGGER = logging.getLogger(__name__)
@@ -47,6 +48,30 @@ class EspuinoOnlineStateBinarySensor(EspuinoMqttEntity, BinarySensorEntity):
         # and calls our overridden `_mqtt_device_online_state_received`.
         # We don't need to subscribe to anything else.
         await super().async_added_to_hass()
+        # While the connection flaps, the hub holds the online state and reports it as unstable
+        self._attr_extra_state_attributes["unstable"] = self._hub.unstable
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_UNSTABLE.format(self._device_name), self._async_unstable_changed
+            )
+        )
+
+    @callback
+    def _async_unstable_changed(self):
+        self._attr_extra_state_attributes["unstable"] = self._hub.unstable
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Stay available while the device is silent, the state shows the connection instead."""
+        return self._attr_available
+
+    @property
+    def is_on(self) -> bool | None:
+        """Report disconnected when the staleness watchdog marked the device silent."""
+        if self._hub.stale:
+            return False
+        return self._attr_is_on
 
     @callback
     def _mqtt_device_online_state_received(self, msg):
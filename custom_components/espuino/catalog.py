@@ -0,0 +1,190 @@
+"""Persistent catalog of known RFID cards, shared by all ESPuino devices."""
+import bisect
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_CATALOG, STORAGE_KEY_CARDS, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+SAVE_DELAY = 30 # Sekunden; mehrere Scans werden zu einem Schreibvorgang zusammengefasst
+
+
+async def async_get_catalog(hass: HomeAssistant) -> "EspuinoCardCatalog":
+    """Return the shared card catalog, loading it from storage on first use."""
+    catalog = hass.data.get(DATA_CATALOG)
+    if catalog is None:
+        catalog = EspuinoCardCatalog(hass)
+        hass.data[DATA_CATALOG] = catalog
+        await catalog.async_load()
+    return catalog
+
+
+class EspuinoCardCatalog:
+    """In-memory index of RFID cards, persisted via the HA storage helper.
+
+    A card is either fleet-wide (empty ``devices`` list) or bound to the
+    devices that have seen it. Labels are kept in a sorted index so that
+    prefix lookups for the media browser are a bisect instead of a scan.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the catalog."""
+        self.hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_CARDS)
+        self._cards: dict[str, dict] = {}
+        self._index: list[tuple[str, str]] = [] # (sort key, card id), sortiert
+        self._index_dirty = True
+
+    async def async_load(self) -> None:
+        """Load the catalog from storage."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for card in data.get("cards", []):
+            self._cards[card["id"]] = card
+        self._index_dirty = True
+        _LOGGER.debug("Loaded %s RFID cards from storage", len(self._cards))
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to persist."""
+        return {"cards": list(self._cards.values())}
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @staticmethod
+    def _sort_key(card: dict) -> str:
+        return (card.get("label") or card["id"]).casefold()
+
+    @staticmethod
+    def _new_card(card_id: str) -> dict:
+        return {"id": card_id, "label": None, "folder": None, "play_mode": None, "devices": [], "last_used": None}
+
+    def _ensure_index(self) -> None:
+        if self._index_dirty:
+            self._index = sorted((self._sort_key(card), card_id) for card_id, card in self._cards.items())
+            self._index_dirty = False
+
+    def get(self, card_id: str) -> dict | None:
+        """Return the card with the given ID, if known."""
+        return self._cards.get(card_id)
+
+    @staticmethod
+    def visible_to(card: dict, device_name: str | None) -> bool:
+        """Return True if the card is fleet-wide or bound to the device."""
+        devices = card.get("devices")
+        return device_name is None or not devices or device_name in devices
+
+    def search(self, prefix: str, device_name: str | None = None, limit: int | None = None) -> list[dict]:
+        """Return cards whose label (or ID, if unlabeled) starts with prefix."""
+        self._ensure_index()
+        prefix = prefix.casefold()
+        result = []
+        pos = bisect.bisect_left(self._index, (prefix, ""))
+        while pos < len(self._index):
+            key, card_id = self._index[pos]
+            if not key.startswith(prefix):
+                break
+            card = self._cards[card_id]
+            if self.visible_to(card, device_name):
+                result.append(card)
+                if limit is not None and len(result) >= limit:
+                    break
+            pos += 1
+        return result
+
+    def browse(self, prefix: str, device_name: str | None = None, limit: int = 200) -> tuple[list[str], list[dict]]:
+        """Return (sub-prefixes, cards) for one node of the media browser.
+
+        Small result sets are returned as a flat card list; larger ones are
+        split into groups one character longer than prefix.
+        """
+        cards = self.search(prefix, device_name, limit + 1)
+        if len(cards) <= limit:
+            return [], cards
+        prefix = prefix.casefold()
+        depth = len(prefix) + 1
+        prefixes = []
+        cards = []
+        pos = bisect.bisect_left(self._index, (prefix, ""))
+        while pos < len(self._index):
+            key, card_id = self._index[pos]
+            if not key.startswith(prefix):
+                break
+            card = self._cards[card_id]
+            if not self.visible_to(card, device_name):
+                pos += 1
+            elif len(key) < depth:
+                # Label entspricht genau dem Präfix -> direkt als Karte anzeigen
+                cards.append(card)
+                pos += 1
+            else:
+                next_prefix = key[:depth]
+                prefixes.append(next_prefix)
+                # Rest dieser Gruppe überspringen
+                pos = bisect.bisect_left(self._index, (next_prefix + "\U0010ffff", ""), pos)
+        return prefixes, cards
+
+    @callback
+    def async_learn(
+        self,
+        card_id: str,
+        device_name: str,
+        folder: str | None = None,
+        play_mode: str | None = None,
+        used: bool = True,
+    ) -> None:
+        """Record a card seen on a device, creating it if it is unknown.
+
+        Only an actual scan (used) updates last_used. Folder and play mode
+        updates, e.g. from retained messages after a restart, are saved only
+        when they change something.
+        """
+        changed = used
+        card = self._cards.get(card_id)
+        if card is None:
+            # Frisch gelernte Karten gehören zunächst zum Gerät, das sie gesehen hat
+            card = self._new_card(card_id)
+            card["devices"].append(device_name)
+            self._cards[card_id] = card
+            self._index_dirty = True
+            changed = True
+            _LOGGER.debug("Learned new RFID card %s on %s", card_id, device_name)
+        elif card["devices"] and device_name not in card["devices"]:
+            card["devices"].append(device_name)
+            changed = True
+        if used:
+            card["last_used"] = dt_util.utcnow().isoformat()
+        if folder is not None and card.get("folder") != folder:
+            card["folder"] = folder
+            changed = True
+        if play_mode is not None and card.get("play_mode") != play_mode:
+            card["play_mode"] = play_mode
+            changed = True
+        if changed:
+            self._async_schedule_save()
+
+    @callback
+    def async_set_card(self, card_id: str, **changes) -> dict:
+        """Create or edit a card. A ``devices`` value of [] makes it fleet-wide."""
+        card = self._cards.setdefault(card_id, self._new_card(card_id))
+        for key, value in changes.items():
+            card[key] = list(value) if key == "devices" else value
+        self._index_dirty = True
+        self._async_schedule_save()
+        return card
+
+    @callback
+    def async_remove_card(self, card_id: str) -> bool:
+        """Remove a card from the catalog."""
+        if self._cards.pop(card_id, None) is None:
+            return False
+        self._index_dirty = True
+        self._async_schedule_save()
+        return True
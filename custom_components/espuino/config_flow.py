@@ -1,14 +1,70 @@
+import asyncio
+import logging
+
 from homeassistant import config_entries
 from homeassistant.core import callback
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.helpers.selector import SelectSelector, SelectSelectorConfig
 from homeassistant.helpers.typing import DiscoveryInfoType, ConfigType
 from typing import Any, Dict, Optional
 
 import voluptuous as vol
-from .const import DOMAIN, CONF_DEVICE_NAME, CONF_FRIENDLY_NAME, DEFAULT_MQTT_BASE_TOPIC
+
+try:
+    from homeassistant.helpers.service_info.mqtt import MqttServiceInfo
+except ImportError: # HA < 2025.1
+    from homeassistant.components.mqtt import MqttServiceInfo
+
+from .const import (
+    DOMAIN,
+    CONF_DEVICE_NAME,
+    CONF_FRIENDLY_NAME,
+    DEFAULT_MQTT_BASE_TOPIC,
+    DEFAULT_MQTT_STATE_TOPIC,
+    STATE_SUFFIX_ONLINE_STATE,
+    PAYLOAD_ONLINE,
+    DATA_DISCOVERED,
+    CONF_DEVICES,
+    CONF_ADD_ALL,
+    CONF_COVER_ART_DIR,
+    DEFAULT_COVER_ART_DIR,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+    CONF_MAX_RATE,
+    DEFAULT_MAX_RATE,
+    CONF_FEATURES,
+    DEFAULT_FEATURES,
+    CONF_QOS_TELEMETRY,
+    CONF_QOS_STATE,
+    CONF_QOS_CRITICAL,
+    DEFAULT_QOS_TELEMETRY,
+    DEFAULT_QOS_STATE,
+    DEFAULT_QOS_CRITICAL,
+    CONF_ENTITY_PROFILE,
+    DEFAULT_ENTITY_PROFILE,
+    PROFILE_FULL,
+    PROFILE_LEAN,
+    CONF_DEFER_PLATFORMS,
+    DEFAULT_DEFER_PLATFORMS,
+)
+
+_LOGGER = logging.getLogger(__name__)
 
 class EspuinoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._device_name: Optional[str] = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return EspuinoOptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: Optional[Dict[str, Any]] = None
     ) -> config_entries.FlowResult:
@@ -50,3 +106,187 @@ class EspuinoConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+    async def async_step_mqtt(self, discovery_info: MqttServiceInfo) -> config_entries.FlowResult:
+        """Handle an ESPuino announcing itself on <device>/State/State."""
+        payload = discovery_info.payload
+        if isinstance(payload, bytes):
+            payload = payload.decode("utf-8", "replace")
+        topic_parts = discovery_info.topic.split("/")
+        if (
+            payload != PAYLOAD_ONLINE
+            or len(topic_parts) != 3
+            or topic_parts[1:] != [DEFAULT_MQTT_STATE_TOPIC, STATE_SUFFIX_ONLINE_STATE]
+        ):
+            return self.async_abort(reason="not_espuino_device")
+
+        device_name = topic_parts[0]
+        await self.async_set_unique_id(device_name)
+        self._abort_if_unique_id_configured()
+
+        # Alle entdeckten Geräte merken, damit sie in einem Schritt hinzugefügt werden können
+        self.hass.data.setdefault(DATA_DISCOVERED, set()).add(device_name)
+        self._device_name = device_name
+        self.context["title_placeholders"] = {"name": device_name}
+        return await self.async_step_discovery_confirm()
+
+    async def async_step_discovery_confirm(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> config_entries.FlowResult:
+        """Confirm a discovered device, optionally together with all other discovered ones."""
+        pending = self._async_pending_devices()
+        if user_input is not None:
+            if user_input.get(CONF_ADD_ALL):
+                await self._async_import_devices(pending - {self._device_name})
+            return self.async_create_entry(
+                title=self._device_name,
+                data={CONF_DEVICE_NAME: self._device_name, CONF_FRIENDLY_NAME: self._device_name},
+            )
+
+        return self.async_show_form(
+            step_id="discovery_confirm",
+            data_schema=vol.Schema({vol.Optional(CONF_ADD_ALL, default=len(pending) > 1): bool}),
+            description_placeholders={
+                "name": self._device_name,
+                "count": str(len(pending)),
+                "devices": ", ".join(sorted(pending)),
+            },
+        )
+
+    async def async_step_import(self, import_data: Dict[str, Any]) -> config_entries.FlowResult:
+        """Create entries without user interaction.
+
+        Accepts either a single device ({device_name, friendly_name}) or a
+        list of device names ({devices: [...]}).
+        """
+        if CONF_DEVICES in import_data:
+            configured = self._async_current_ids()
+            names = [name for name in dict.fromkeys(import_data[CONF_DEVICES]) if name not in configured]
+            if not names:
+                return self.async_abort(reason="already_configured")
+            # Der erste Eintrag entsteht in diesem Flow, die übrigen in eigenen Import-Flows
+            await self._async_import_devices(names[1:])
+            import_data = {CONF_DEVICE_NAME: names[0]}
+
+        device_name = import_data[CONF_DEVICE_NAME]
+        # Laufende Discovery-Flows für dasselbe Gerät werden beim Anlegen der Entry beendet
+        await self.async_set_unique_id(device_name, raise_on_progress=False)
+        self._abort_if_unique_id_configured()
+        friendly_name = import_data.get(CONF_FRIENDLY_NAME) or device_name
+        return self.async_create_entry(
+            title=friendly_name,
+            data={CONF_DEVICE_NAME: device_name, CONF_FRIENDLY_NAME: friendly_name},
+        )
+
+    @callback
+    def _async_pending_devices(self) -> set[str]:
+        """Return discovered devices that are not configured yet, computed in one pass.
+
+        Devices without a running discovery flow (configured, ignored or
+        removed since) are dropped from the remembered set.
+        """
+        discovering = {
+            flow["context"].get("unique_id")
+            for flow in self._async_in_progress(include_uninitialized=True)
+            if flow["context"].get("source") == config_entries.SOURCE_MQTT
+        }
+        discovering.add(self._device_name)
+        discovered = self.hass.data.get(DATA_DISCOVERED, set())
+        discovered &= discovering
+        return discovered - set(self._async_current_ids())
+
+    @callback
+    async def _async_import_devices(self, device_names) -> None:
+        """Run one non-interactive import flow per device name and log the ones that failed."""
+        device_names = list(device_names)
+        results = await asyncio.gather(
+            *(
+                self.hass.config_entries.flow.async_init(
+                    DOMAIN,
+                    context={"source": config_entries.SOURCE_IMPORT},
+                    data={CONF_DEVICE_NAME: device_name},
+                )
+                for device_name in device_names
+            ),
+            return_exceptions=True,
+        )
+        for device_name, result in zip(device_names, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Could not add ESPuino %s: %s", device_name, result)
+            elif result.get("type") != FlowResultType.CREATE_ENTRY:
+                _LOGGER.warning("ESPuino %s was not added: %s", device_name, result.get("reason"))
+
+
+class EspuinoOptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle ESPuino options."""
+
+    async def async_step_init(
+        self, user_input: Optional[Dict[str, Any]] = None
+    ) -> config_entries.FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    # Verzeichnis mit Cover-Bildern (<RFID>.jpg oder <Ordnername>.jpg)
+                    vol.Optional(
+                        CONF_COVER_ART_DIR,
+                        default=options.get(CONF_COVER_ART_DIR, DEFAULT_COVER_ART_DIR),
+                    ): str,
+                    # Minuten ohne Nachricht, bis das Gerät als nicht verfügbar gilt (0 = aus)
+                    vol.Optional(
+                        CONF_STALE_TIMEOUT,
+                        default=options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=1440)),
+                    # Flood-Schutz: Nachrichten pro Sekunde und Topic (0 = unbegrenzt)
+                    vol.Optional(
+                        CONF_MAX_RATE,
+                        default=options.get(CONF_MAX_RATE, DEFAULT_MAX_RATE),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+                    # Funktionsgruppen lassen sich ohne Neuladen zu- und abschalten
+                    vol.Optional(
+                        CONF_FEATURES,
+                        default=options.get(CONF_FEATURES, DEFAULT_FEATURES),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=DEFAULT_FEATURES,
+                            multiple=True,
+                            translation_key=CONF_FEATURES,
+                        )
+                    ),
+                    # Schlankes Profil ohne doppelte Entitäten (Änderung lädt das Gerät neu)
+                    vol.Optional(
+                        CONF_ENTITY_PROFILE,
+                        default=options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE),
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[PROFILE_FULL, PROFILE_LEAN],
+                            translation_key=CONF_ENTITY_PROFILE,
+                        )
+                    ),
+                    # Sensoren & Co. erst nach dem HA-Start laden (wirkt beim nächsten Start)
+                    vol.Optional(
+                        CONF_DEFER_PLATFORMS,
+                        default=options.get(CONF_DEFER_PLATFORMS, DEFAULT_DEFER_PLATFORMS),
+                    ): bool,
+                    # MQTT-QoS pro Topic-Klasse (0, 1 oder 2)
+                    vol.Optional(
+                        CONF_QOS_TELEMETRY,
+                        default=options.get(CONF_QOS_TELEMETRY, DEFAULT_QOS_TELEMETRY),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2)),
+                    vol.Optional(
+                        CONF_QOS_STATE,
+                        default=options.get(CONF_QOS_STATE, DEFAULT_QOS_STATE),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2)),
+                    vol.Optional(
+                        CONF_QOS_CRITICAL,
+                        default=options.get(CONF_QOS_CRITICAL, DEFAULT_QOS_CRITICAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2)),
+                }
+            ),
+        )
@@ -36,3 +36,96 @@ TOPIC_SLEEP_TIMER_CMND = "SleepTimer"
 TOPIC_LOCK_CONTROLS_CMND = "LockControls"
 TOPIC_REPEAT_MODE_CMND = "RepeatMode"
 COMMAND_SUFFIX_LED_BRIGHTNESS = "LedBrightness" # Befehl zum Setzen der LED Helligkeit
+
+# --- RFID card catalog ---
+DATA_CATALOG = f"{DOMAIN}_catalog" # hass.data key für den gemeinsamen Kartenkatalog
+STORAGE_VERSION = 1
+STORAGE_KEY_CARDS = f"{DOMAIN}.cards"
+MEDIA_TYPE_RFID_CARD = "espuino_rfid" # media_content_type für Karten im Media Browser
+
+SERVICE_SET_CARD = "set_card"
+SERVICE_REMOVE_CARD = "remove_card"
+ATTR_CARD_ID = "card_id"
+ATTR_LABEL = "label"
+ATTR_FOLDER = "folder"
+ATTR_PLAY_MODE = "play_mode"
+ATTR_DEVICES = "devices"
+STORAGE_KEY_LIBRARY = f"{DOMAIN}.library" # + ".<device_name>"
+
+# --- Optionen (Options Flow) ---
+CONF_COVER_ART_DIR = "cover_art_dir" # Verzeichnis mit Cover-Bildern, relativ zum HA-Config-Verzeichnis
+DEFAULT_COVER_ART_DIR = "espuino_covers"
+
+DATA_COVER_ART = f"{DOMAIN}_cover_art" # hass.data key für den gemeinsamen Cover-Cache
+
+# --- RFID Events / Device Trigger ---
+EVENT_RFID_SCANNED = f"{DOMAIN}_rfid_scanned"
+TRIGGER_TYPE_RFID_SCANNED = "rfid_scanned"
+DATA_RFID_TRIGGERS = f"{DOMAIN}_rfid_triggers"
+
+# Optionaler Sammel-Topic: JSON-Objekt mit allen Werten, Schlüssel = STATE_SUFFIX_...
+STATE_SUFFIX_SNAPSHOT = "All"
+CONF_STALE_TIMEOUT = "stale_timeout" # Minuten ohne Nachricht, bis das Gerät als nicht verfügbar gilt (0 = aus)
+DEFAULT_STALE_TIMEOUT = 30
+
+DATA_WATCHDOG = f"{DOMAIN}_watchdog"
+SIGNAL_AVAILABILITY = f"{DOMAIN}_availability_{{}}" # .format(device_name)
+CONF_MAX_RATE = "max_rate" # Erlaubte Nachrichten pro Sekunde und Topic (0 = unbegrenzt)
+DEFAULT_MAX_RATE = 5
+
+# --- Onboarding (MQTT Discovery / Import) ---
+DATA_DISCOVERED = f"{DOMAIN}_discovered" # Per MQTT entdeckte Gerätenamen
+CONF_DEVICES = "devices" # Liste von Gerätenamen für den Import
+CONF_ADD_ALL = "add_all"
+SERVICE_IMPORT_DEVICES = "import_devices"
+CONF_FEATURES = "features" # Aktivierte Funktionsgruppen
+FEATURE_SNAPSHOT = "snapshot" # Sammel-Topic State/All
+FEATURE_RFID_EVENTS = "rfid_events" # RFID-Events und Geräte-Trigger
+FEATURE_COVER_ART = "cover_art" # Cover aus lokalem Verzeichnis
+DEFAULT_FEATURES = [FEATURE_SNAPSHOT, FEATURE_RFID_EVENTS, FEATURE_COVER_ART]
+
+SIGNAL_OPTIONS_UPDATED = f"{DOMAIN}_options_updated_{{}}" # .format(device_name)
+
+# --- QoS pro Topic-Klasse ---
+TOPIC_CLASS_TELEMETRY = "telemetry" # Häufige Messwerte, der nächste Wert ersetzt einen verlorenen
+TOPIC_CLASS_STATE = "state" # Zustände und gewöhnliche Befehle
+TOPIC_CLASS_CRITICAL = "critical" # Befehle, die nicht verloren gehen dürfen (Sleep, Karte laden)
+CONF_QOS_TELEMETRY = "qos_telemetry"
+CONF_QOS_STATE = "qos_state"
+CONF_QOS_CRITICAL = "qos_critical"
+DEFAULT_QOS_TELEMETRY = 0
+DEFAULT_QOS_STATE = 0
+DEFAULT_QOS_CRITICAL = 1
+
+# --- Nutzungsstatistik ---
+STORAGE_KEY_STATS = f"{DOMAIN}.stats" # + ".<device_name>"
+SIGNAL_STATS_UPDATED = f"{DOMAIN}_stats_updated_{{}}" # .format(device_name)
+
+# --- Lautstärke-Fade ---
+SERVICE_FADE_VOLUME = "fade_volume"
+ATTR_LOUDNESS = "loudness" # ESPuino-Lautstärke 0-21
+ATTR_DURATION = "duration"
+MAX_LOUDNESS = 21
+DATA_FADER = f"{DOMAIN}_fader"
+
+# --- Entitätsprofil ---
+CONF_ENTITY_PROFILE = "entity_profile"
+PROFILE_FULL = "full" # Alle Entitäten
+PROFILE_LEAN = "lean" # Ohne Entitäten, die nur Werte einer anderen Entität wiederholen
+DEFAULT_ENTITY_PROFILE = PROFILE_FULL
+# (Plattform, entity_description_key) der Entitäten, die im schlanken Profil entfallen
+LEAN_PROFILE_OMITTED = (
+    ("sensor", "loudness_state"), # = volume_level / loudness am Media Player
+    ("sensor", "led_brightness_state"), # = Zustand der LED-Helligkeit (Number)
+    ("sensor", "track_state"), # = media_title & Co. am Media Player
+)
+SIGNAL_UNSTABLE = f"{DOMAIN}_unstable_{{}}" # .format(device_name), Verbindung flattert
+DATA_RESYNC = f"{DOMAIN}_resync" # hass.data key für die Resync-Koordination nach Broker-Reconnect
+
+# --- Profiler ---
+SERVICE_PROFILE = "profile"
+ATTR_SECONDS = "seconds"
+DEFAULT_PROFILE_SECONDS = 30
+DATA_PROFILER = f"{DOMAIN}_profiler"
+CONF_DEFER_PLATFORMS = "defer_platforms" # Nebensächliche Plattformen erst nach dem HA-Start laden
+DEFAULT_DEFER_PLATFORMS = False
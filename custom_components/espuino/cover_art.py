@@ -0,0 +1,161 @@
+"""Cover art for ESPuino cards and folders, served from a local directory."""
+from collections import OrderedDict
+import hashlib
+import io
+import logging
+import os
+import stat
+import time
+from typing import NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_COVER_ART
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_MAX_BYTES = 16 * 1024 * 1024 # Obergrenze für alle Thumbnails im Speicher
+THUMBNAIL_SIZE = 512 # Kantenlänge in Pixeln
+MISS_RETRY = 300 # Sekunden, bis nach einem nicht gefundenen Cover erneut gesucht wird
+RECHECK_INTERVAL = 30 # Sekunden, nach denen ein Treffer erneut gegen die Datei geprüft wird
+MISSES_MAX = 256 # Obergrenze für gemerkte Fehlschläge, die ältesten fallen zuerst heraus
+IMAGE_TYPES = {"jpg": "image/jpeg", "jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class CoverArt(NamedTuple):
+    """One encoded, resized cover image."""
+
+    etag: str
+    content: bytes
+    content_type: str
+    path: str # Quelldatei
+    signature: tuple[int, int] # (st_mtime_ns, st_size) der Quelldatei beim Laden
+
+
+def cover_keys(rfid: str | None, folder: str | None) -> tuple[str, ...]:
+    """Return the file name stems to try for a card and folder, most specific first.
+
+    ``/Hoerspiele/Benjamin Bluemchen`` is looked up as
+    ``Hoerspiele_Benjamin Bluemchen`` and as ``Benjamin Bluemchen``.
+    """
+    keys = []
+    if rfid:
+        keys.append(rfid)
+    if folder:
+        parts = [part for part in folder.split("/") if part]
+        if parts:
+            keys.append("_".join(parts))
+            keys.append(parts[-1])
+    return tuple(dict.fromkeys(keys))
+
+
+def _find_image(directory: str, keys: tuple[str, ...]) -> tuple[str, str, tuple[int, int]] | None:
+    """Return path, content type and signature of the first matching image. Runs in the executor."""
+    for key in keys:
+        for extension, content_type in IMAGE_TYPES.items():
+            path = os.path.join(directory, f"{key}.{extension}")
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                return path, content_type, (st.st_mtime_ns, st.st_size)
+    return None
+
+
+def _load_thumbnail(directory: str, keys: tuple[str, ...]) -> CoverArt | None:
+    """Find, read and resize the first matching image. Runs in the executor."""
+    if (found := _find_image(directory, keys)) is None:
+        return None
+    path, content_type, signature = found
+    with open(path, "rb") as file:
+        content = file.read()
+    try:
+        from PIL import Image
+
+        with Image.open(io.BytesIO(content)) as image:
+            image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=85)
+        content = buffer.getvalue()
+        content_type = "image/jpeg"
+    except ImportError:
+        pass # Ohne Pillow wird das Originalbild ausgeliefert
+    except Exception as e:
+        _LOGGER.warning("Could not resize cover %s, serving original: %s", path, e)
+    etag = hashlib.sha1(content).hexdigest()
+    return CoverArt(etag, content, content_type, path, signature)
+
+
+@callback
+def async_get_cover_cache(hass: HomeAssistant) -> "EspuinoCoverArtCache":
+    """Return the shared cover art cache."""
+    cache = hass.data.get(DATA_COVER_ART)
+    if cache is None:
+        cache = hass.data[DATA_COVER_ART] = EspuinoCoverArtCache(hass)
+    return cache
+
+
+class EspuinoCoverArtCache:
+    """Size-capped LRU of resized cover images, shared by all players.
+
+    File lookups and resizing happen once per image in the executor; after
+    that an image request is served from memory. At most every
+    RECHECK_INTERVAL seconds a hit is checked against the files again
+    (stat only), so an image replaced in place is loaded anew.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._images: OrderedDict[tuple, CoverArt] = OrderedDict()
+        self._misses: OrderedDict[tuple, float] = OrderedDict()
+        self._checked: dict[tuple, float] = {} # Letzte Prüfung eines Treffers gegen die Datei
+
+    async def async_get(self, directory: str, keys: tuple[str, ...]) -> CoverArt | None:
+        """Return the cover for the given lookup keys, loading it if needed."""
+        if not keys:
+            return None
+        cache_key = (directory, keys)
+        art = self._images.get(cache_key)
+        if art is not None:
+            self._images.move_to_end(cache_key)
+            if time.monotonic() - self._checked.get(cache_key, 0) < RECHECK_INTERVAL:
+                return art
+            self._checked[cache_key] = time.monotonic()
+            found = await self.hass.async_add_executor_job(_find_image, directory, keys)
+            if found is not None and (found[0], found[2]) == (art.path, art.signature):
+                return art
+            _LOGGER.debug("Cover for %s changed on disk, reloading", keys)
+            self._remove(cache_key)
+        missed_at = self._misses.get(cache_key)
+        if missed_at is not None and time.monotonic() - missed_at < MISS_RETRY:
+            return None
+
+        art = await self.hass.async_add_executor_job(_load_thumbnail, directory, keys)
+        if art is None:
+            self._misses.pop(cache_key, None)
+            self._misses[cache_key] = time.monotonic()
+            while len(self._misses) > MISSES_MAX:
+                self._misses.popitem(last=False)
+            return None
+        self._misses.pop(cache_key, None)
+        self._insert(cache_key, art)
+        return art
+
+    def _insert(self, cache_key: tuple, art: CoverArt) -> None:
+        self._remove(cache_key)
+        self._images[cache_key] = art
+        self._checked[cache_key] = time.monotonic()
+        self._size += len(art.content)
+        while self._size > self._max_bytes and len(self._images) > 1:
+            evicted_key, evicted = self._images.popitem(last=False)
+            self._checked.pop(evicted_key, None)
+            self._size -= len(evicted.content)
+
+    def _remove(self, cache_key: tuple) -> None:
+        if (old := self._images.pop(cache_key, None)) is not None:
+            self._size -= len(old.content)
+        self._checked.pop(cache_key, None)
@@ -0,0 +1,76 @@
+"""Device triggers for ESPuino RFID scans."""
+import voluptuous as vol
+
+from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEMA
+from homeassistant.components.device_automation.exceptions import InvalidDeviceAutomationConfig
+from homeassistant.const import CONF_DEVICE_ID, CONF_DOMAIN, CONF_PLATFORM, CONF_TYPE
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN, ATTR_CARD_ID, TRIGGER_TYPE_RFID_SCANNED
+from .rfid_events import async_get_rfid_triggers
+
+TRIGGER_TYPES = {TRIGGER_TYPE_RFID_SCANNED}
+
+TRIGGER_SCHEMA = DEVICE_TRIGGER_BASE_SCHEMA.extend(
+    {
+        vol.Required(CONF_TYPE): vol.In(TRIGGER_TYPES),
+        # Ohne card_id löst der Trigger bei jeder Karte aus
+        vol.Optional(ATTR_CARD_ID): cv.string,
+    }
+)
+
+
+async def async_get_triggers(hass: HomeAssistant, device_id: str) -> list[dict]:
+    """List device triggers for an ESPuino device."""
+    return [
+        {
+            CONF_PLATFORM: "device",
+            CONF_DOMAIN: DOMAIN,
+            CONF_DEVICE_ID: device_id,
+            CONF_TYPE: trigger_type,
+        }
+        for trigger_type in TRIGGER_TYPES
+    ]
+
+
+async def async_get_trigger_capabilities(hass: HomeAssistant, config: ConfigType) -> dict:
+    """Return the optional card ID field."""
+    return {"extra_fields": vol.Schema({vol.Optional(ATTR_CARD_ID): str})}
+
+
+async def async_attach_trigger(
+    hass: HomeAssistant,
+    config: ConfigType,
+    action: TriggerActionType,
+    trigger_info: TriggerInfo,
+) -> CALLBACK_TYPE:
+    """Attach a trigger for RFID scans on one device."""
+    device = dr.async_get(hass).async_get(config[CONF_DEVICE_ID])
+    device_name = next(
+        (identifier for domain, identifier in device.identifiers if domain == DOMAIN), None
+    ) if device else None
+    if device_name is None:
+        raise InvalidDeviceAutomationConfig(f"Unknown ESPuino device {config[CONF_DEVICE_ID]}")
+
+    job = HassJob(action)
+    trigger_data = trigger_info["trigger_data"]
+    card_id = config.get(ATTR_CARD_ID)
+
+    @callback
+    def async_rfid_scanned(event_data: dict) -> None:
+        hass.async_run_hass_job(
+            job,
+            {
+                "trigger": {
+                    **trigger_data,
+                    **config,
+                    **event_data,
+                    "description": f"RFID card {event_data[ATTR_CARD_ID]} scanned",
+                }
+            },
+        )
+
+    return async_get_rfid_triggers(hass).async_attach(device_name, card_id, async_rfid_scanned)
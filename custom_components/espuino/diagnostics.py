@@ -0,0 +1,30 @@
+"""Diagnostics support for ESPuino."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .resync import async_get_resync
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for one ESPuino."""
+    hub = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "device_name": hub.device_name,
+        "options": dict(entry.options),
+        "features": sorted(hub.features),
+        "stale": hub.stale,
+        "unstable": hub.unstable,
+        "seconds_since_last_message": round(hass.loop.time() - hub.last_seen, 1),
+        "qos": hub.qos,
+        # Gesendete Befehle gegen bestätigende State-Nachrichten, pro Topic-Klasse
+        "command_delivery": hub.delivery.as_dict(),
+        # Nach Broker-Reconnects: gesammelte gegen tatsächlich verteilte Nachrichten dieses Geräts
+        "resync": {
+            "messages_received": hub.resync_received,
+            "messages_dispatched": hub.resync_dispatched,
+            **async_get_resync(hass).as_dict(),
+        },
+    }
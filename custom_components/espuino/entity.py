@@ -2,13 +2,9 @@
 import logging # Import the logging module
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo, Entity
-
-from homeassistant.components.mqtt import (
-    async_subscribe as mqtt_async_subscribe,
-    async_publish as mqtt_async_publish
-)
-from .const import DOMAIN, CONF_DEVICE_NAME, CONF_FRIENDLY_NAME, DEFAULT_MQTT_BASE_TOPIC, DEFAULT_MQTT_STATE_TOPIC, STATE_SUFFIX_ONLINE_STATE, PAYLOAD_ONLINE, PAYLOAD_OFFLINE
+from .const import DOMAIN, CONF_DEVICE_NAME, CONF_FRIENDLY_NAME, DEFAULT_MQTT_BASE_TOPIC, DEFAULT_MQTT_STATE_TOPIC, STATE_SUFFIX_ONLINE_STATE, PAYLOAD_ONLINE, PAYLOAD_OFFLINE, SIGNAL_AVAILABILITY
 
 _LOGGER = logging.getLogger(__name__) # Initialize logger for this module
 
@@ -26,6 +22,7 @@ class EspuinoMqttEntity(Entity):
 
         # entry.unique_id from config_flow is now self._device_name
         # entity_description_key should be unique per entity type (e.g., "track_state", "loudness")
+        self.entity_description_key = entity_description_key
         self._attr_unique_id = f"{self._device_name}_{entity_description_key}"
 
         self._attr_extra_state_attributes = {} # Initialize extra_state_attributes
@@ -33,6 +30,17 @@ class EspuinoMqttEntity(Entity):
 
         # Store a reference to the device's availability state topic
         self._device_online_topic = self._get_full_state_topic(STATE_SUFFIX_ONLINE_STATE)
+
+    @property
+    def _hub(self):
+        """Return the shared runtime data (EspuinoHub) of this entity's device."""
+        return self.hass.data[DOMAIN][self._entry.entry_id]
+
+    @property
+    def available(self) -> bool:
+        """Unavailable when the device reported Offline or went silent (staleness watchdog)."""
+        return self._attr_available and not self._hub.stale
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information about this ESPuino device."""
@@ -48,14 +56,20 @@ class EspuinoMqttEntity(Entity):
         """Subscribe to the device's availability topic when entity is added to hass."""
         await super().async_added_to_hass()
         # Subscribe to the device's online/offline topic for general availability.
-        # This is done once per entity and the subscription is automatically
-        # cleaned up when the entity is removed.
+        # The hub shares one MQTT subscription between all entities of the device,
+        # the callback is automatically removed when the entity is removed.
         self.async_on_remove(
-            await mqtt_async_subscribe(
-                self.hass,
-                self._device_online_topic,
+            await self._hub.async_subscribe(
+                STATE_SUFFIX_ONLINE_STATE,
                 self._mqtt_device_online_state_received,
-                qos=0,
+            )
+        )
+        # The staleness watchdog signals when the device goes silent or comes back
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_AVAILABILITY.format(self._device_name),
+                self.async_write_ha_state,
             )
         )
 
@@ -84,10 +98,11 @@ class EspuinoMqttEntity(Entity):
             
         self._attr_extra_state_attributes.update({"mqtt_topic": full_topic})
 
-        # Explicitly set qos=0. Defaults for encoding will be used.
-        # The subscription is automatically cleaned up when the entity is removed.
+        # The hub holds one MQTT subscription per topic and also dispatches changed
+        # fields of the combined snapshot topic to this callback.
+        # The callback is automatically removed when the entity is removed.
         self.async_on_remove(
-            await mqtt_async_subscribe(self.hass, full_topic, msg_callback, qos=0)
+            await self._hub.async_subscribe(topic_suffix, msg_callback)
         )
 
     async def async_will_remove_from_hass(self) -> None:
@@ -136,11 +151,12 @@ class EspuinoMqttEntity(Entity):
         To be overridden by subclasses."""
         pass  # Default: do nothing, subclasses will implement
 
-    async def async_publish_mqtt(self, topic_suffix: str, payload: str, qos: int = 0, retain: bool = False):
-        """Publish a message to an MQTT command topic suffix (from TOPIC_..._CMND constants)."""
-        full_topic = self._get_full_command_topic(topic_suffix)
-        await mqtt_async_publish(
-            self.hass, full_topic, payload, qos, retain
-        )
+    async def async_publish_mqtt(self, topic_suffix: str, payload: str, qos: int | None = None, retain: bool = False):
+        """Publish a message to an MQTT command topic suffix (from TOPIC_..._CMND constants).
+
+        Without an explicit qos the hub uses the configured QoS of the
+        command's topic class and counts the command for delivery tracking.
+        """
+        await self._hub.async_publish(topic_suffix, payload, qos, retain)
 
 
@@ -0,0 +1,147 @@
+"""Volume fades for all ESPuino players, driven by one shared timer."""
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+
+from .const import DATA_FADER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_fader(hass: HomeAssistant) -> "EspuinoVolumeFader":
+    """Return the shared volume fader."""
+    fader = hass.data.get(DATA_FADER)
+    if fader is None:
+        fader = hass.data[DATA_FADER] = EspuinoVolumeFader(hass)
+    return fader
+
+
+class _Fade:
+    __slots__ = ("start_level", "target", "start_time", "duration", "level", "scheduled", "seq")
+
+    def __init__(self, start_level: int, target: int, start_time: float, duration: float) -> None:
+        self.start_level = start_level
+        self.target = target
+        self.start_time = start_time
+        self.duration = duration
+        self.level = start_level # Zuletzt gesendete Stufe
+        self.scheduled = start_level # Stufe, für deren step_time der Heap-Eintrag gilt
+        self.seq = None
+
+    @property
+    def direction(self) -> int:
+        return 1 if self.target > self.start_level else -1
+
+    def step_time(self, level: int) -> float:
+        """Return the loop time at which the fade reaches a level."""
+        steps = abs(self.target - self.start_level)
+        return self.start_time + self.duration * abs(level - self.start_level) / steps
+
+    def level_at(self, now: float) -> int:
+        """Return the level the fade should have reached at a loop time.
+
+        The level that was scheduled is always due, even if the float
+        arithmetic lands just below it; a late timer catches up further.
+        """
+        if now >= self.start_time + self.duration:
+            return self.target
+        steps = abs(self.target - self.start_level)
+        done = max(int(steps * (now - self.start_time) / self.duration), abs(self.scheduled - self.start_level))
+        return self.start_level + done * self.direction
+
+    def has_sent(self, level: int) -> bool:
+        """Return True if level lies between the start and the last sent level."""
+        return 0 <= (level - self.start_level) * self.direction <= (self.level - self.start_level) * self.direction
+
+
+class EspuinoVolumeFader:
+    """Runs the volume fades of all players from one timer and one heap.
+
+    A fade only publishes when the integer Loudness level (0-21) changes,
+    so a fade from 12 to 3 sends nine commands however long it takes. The
+    heap holds the time of each player's next level; cancelled or replaced
+    fades leave stale entries behind that are skipped by sequence number.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the fader."""
+        self.hass = hass
+        self._heap: list[tuple[float, int, object]] = [] # (Zeitpunkt, seq, player)
+        self._seq = itertools.count()
+        self._fades: dict[object, _Fade] = {}
+        self._timer = None
+        self._timer_deadline = None
+
+    @callback
+    def async_start(self, player, start_level: int, target: int, duration: float) -> None:
+        """Fade a player from start_level to target over duration seconds."""
+        self.async_cancel(player)
+        if start_level == target or duration <= 0:
+            player.async_fade_step(target)
+            return
+        fade = self._fades[player] = _Fade(start_level, target, self.hass.loop.time(), duration)
+        _LOGGER.debug("Fading %s from %s to %s in %s s", player.entity_id, start_level, target, duration)
+        fade.scheduled = start_level + fade.direction
+        self._async_push(player, fade, fade.step_time(fade.scheduled))
+
+    @callback
+    def async_cancel(self, player) -> bool:
+        """Stop a player's fade; return True if one was running."""
+        return self._fades.pop(player, None) is not None
+
+    def is_fading(self, player) -> bool:
+        """Return True while a fade of the player is running."""
+        return player in self._fades
+
+    @callback
+    def async_is_own_echo(self, player, level: int) -> bool:
+        """Return True if a reported level was sent by the player's fade.
+
+        Every level the fade already passed is accepted: with short steps
+        (or a held back resync/flood window) echoes can lag several steps
+        behind the published level.
+        """
+        fade = self._fades.get(player)
+        return fade is not None and fade.has_sent(level)
+
+    @callback
+    def _async_push(self, player, fade: _Fade, when: float) -> None:
+        fade.seq = next(self._seq)
+        heapq.heappush(self._heap, (when, fade.seq, player))
+        if self._timer_deadline is None or when < self._timer_deadline:
+            self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._timer is not None:
+            self._timer()
+            self._timer = self._timer_deadline = None
+        if self._heap:
+            self._timer_deadline = self._heap[0][0]
+            self._timer = async_call_at(self.hass, self._async_run, self._timer_deadline)
+
+    @callback
+    def _async_run(self, _now=None) -> None:
+        """Publish the due levels of all fades."""
+        self._timer = self._timer_deadline = None
+        now = self.hass.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, player = heapq.heappop(self._heap)
+            fade = self._fades.get(player)
+            if fade is None or fade.seq != seq:
+                continue # Abgebrochen oder durch einen neuen Fade ersetzt
+            level = fade.level_at(now)
+            if level != fade.level:
+                fade.level = level
+                player.async_fade_step(level)
+            if level == fade.target:
+                del self._fades[player]
+                continue
+            fade.scheduled = level + fade.direction
+            fade.seq = next(self._seq)
+            heapq.heappush(self._heap, (fade.step_time(fade.scheduled), fade.seq, player))
+        self._async_schedule()
@@ -0,0 +1,103 @@
+"""Damping of Online/Offline flapping of one ESPuino."""
+from collections import deque
+from collections.abc import Callable
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import PAYLOAD_ONLINE, PAYLOAD_OFFLINE
+
+_LOGGER = logging.getLogger(__name__)
+
+FLAP_WINDOW = 60 # Sekunden, in denen Wechsel gezählt werden
+FLAP_THRESHOLD = 4 # Ab so vielen Wechseln im Fenster gilt das Gerät als instabil
+HOLD_PERIOD = 300 # Sekunden, für die der Zustand dann festgehalten wird
+
+
+class EspuinoFlapDamper:
+    """Sliding-window flap detection for the online topic of one device.
+
+    While a device is stable every Online/Offline message passes. Once
+    ``FLAP_THRESHOLD`` changes fall into ``FLAP_WINDOW`` the device is
+    reported unstable for ``HOLD_PERIOD`` and only the Online side is
+    damped: Offline (e.g. the Last Will of a device that really died)
+    always passes at once, Online is held back. When the period ends
+    without new flapping, a held Online is released, so the entities see
+    a single transition instead of every flip.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        device_name: str,
+        release: Callable[[Any], None],
+        unstable_changed: Callable[[], None],
+    ) -> None:
+        """Initialize the damper."""
+        self.hass = hass
+        self.device_name = device_name
+        self._release = release
+        self._unstable_changed = unstable_changed
+        self._changes: deque[float] = deque() # Loop-Zeiten der letzten Wechsel
+        self._payload: str | None = None # Zuletzt gesehener Zustand
+        self._passed_payload: str | None = None # Zuletzt durchgelassener Zustand
+        self._held = None
+        self._timer = None
+        self.unstable = False
+
+    @callback
+    def async_allow(self, msg) -> bool:
+        """Return True if an online-topic message may be dispatched now."""
+        payload = msg.payload
+        if payload not in (PAYLOAD_ONLINE, PAYLOAD_OFFLINE):
+            return True
+        now = self.hass.loop.time()
+        if self._payload is not None and payload != self._payload:
+            self._changes.append(now)
+        self._payload = payload
+        while self._changes and self._changes[0] < now - FLAP_WINDOW:
+            self._changes.popleft()
+
+        if not self.unstable and len(self._changes) >= FLAP_THRESHOLD:
+            _LOGGER.info(
+                "%s changed online state %s times within %s s, holding its state for %s s",
+                self.device_name, len(self._changes), FLAP_WINDOW, HOLD_PERIOD,
+            )
+            self.unstable = True
+            self._timer = async_call_later(self.hass, HOLD_PERIOD, self._async_hold_expired)
+            self._unstable_changed()
+        if self.unstable:
+            if payload == PAYLOAD_ONLINE:
+                self._held = msg
+                return False
+            self._held = None # Offline wird nie zurückgehalten
+            if payload == self._passed_payload:
+                return False
+        self._passed_payload = payload
+        return True
+
+    @callback
+    def _async_hold_expired(self, _now) -> None:
+        now = self.hass.loop.time()
+        while self._changes and self._changes[0] < now - FLAP_WINDOW:
+            self._changes.popleft()
+        if len(self._changes) >= FLAP_THRESHOLD:
+            self._timer = async_call_later(self.hass, HOLD_PERIOD, self._async_hold_expired)
+            return # Flattert weiter, Zustand bleibt festgehalten
+        self._timer = None
+        self.unstable = False
+        _LOGGER.info("%s is stable again", self.device_name)
+        held, self._held = self._held, None
+        self._unstable_changed()
+        if held is not None and held.payload != self._passed_payload:
+            self._passed_payload = held.payload
+            self._release(held)
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the hold timer."""
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
@@ -0,0 +1,430 @@
+"""Per-device runtime data shared by the entities of one ESPuino."""
+from collections.abc import Callable
+import logging
+from typing import Any, NamedTuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.components.mqtt import (
+    async_publish as mqtt_async_publish,
+    async_subscribe as mqtt_async_subscribe,
+)
+from homeassistant.util.json import json_loads
+
+from .catalog import async_get_catalog
+from .flap import EspuinoFlapDamper
+from .const import (
+    DOMAIN,
+    CONF_DEVICE_NAME,
+    CONF_COVER_ART_DIR,
+    DEFAULT_COVER_ART_DIR,
+    CONF_STALE_TIMEOUT,
+    DEFAULT_STALE_TIMEOUT,
+    CONF_MAX_RATE,
+    DEFAULT_MAX_RATE,
+    SIGNAL_AVAILABILITY,
+    SIGNAL_OPTIONS_UPDATED,
+    SIGNAL_UNSTABLE,
+    CONF_FEATURES,
+    DEFAULT_FEATURES,
+    CONF_ENTITY_PROFILE,
+    DEFAULT_ENTITY_PROFILE,
+    FEATURE_SNAPSHOT,
+    FEATURE_RFID_EVENTS,
+    DEFAULT_MQTT_BASE_TOPIC,
+    DEFAULT_MQTT_STATE_TOPIC,
+    STATE_SUFFIX_RFID,
+    STATE_SUFFIX_TRACK,
+    STATE_SUFFIX_PLAYBACK_STATE,
+    STATE_SUFFIX_ONLINE_STATE,
+    PAYLOAD_OFFLINE,
+    STATE_SUFFIX_SNAPSHOT,
+    EVENT_RFID_SCANNED,
+    ATTR_CARD_ID,
+    ATTR_LABEL,
+)
+from .library import EspuinoTrackLibrary
+from .qos import ECHO_SUFFIXES, EspuinoDeliveryTracker, command_topic_class, qos_from_options, state_topic_class
+from .ratelimit import EspuinoFloodLimiter
+from .resync import async_get_resync
+from .rfid_events import async_get_rfid_triggers
+from .stats import EspuinoUsageStats
+from .watchdog import async_get_watchdog
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SnapshotMessage(NamedTuple):
+    """Stand-in for an MQTT message, built from one field of the snapshot topic."""
+
+    topic: str
+    payload: str
+    qos: int = 0
+    retain: bool = False
+
+
+class EspuinoHub:
+    """Holds everything the platforms of one config entry share."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.entry = entry
+        self.device_name = entry.data[CONF_DEVICE_NAME]
+        # Das Profil bestimmt, welche Entitäten es gibt; eine Änderung lädt die Entry neu
+        self.entity_profile = entry.options.get(CONF_ENTITY_PROFILE, DEFAULT_ENTITY_PROFILE)
+        self.platforms: list[str] = [] # Bereits geladene Plattformen, für das Entladen
+        self.library = EspuinoTrackLibrary(hass, self.device_name)
+        self.stats = EspuinoUsageStats(hass, self.device_name)
+        self.cover_art_dir = None
+        self.features: set[str] = set()
+        self._feature_unsubscribes: dict[str, Callable[[], None]] = {}
+        self._unsubscribes: list[Callable[[], None]] = []
+        self._catalog = None
+        self._device_id = None
+        # Eine MQTT-Subscription pro State-Suffix, verteilt an alle interessierten Entitäten
+        self._listeners: dict[str, list[Callable[[Any], None]]] = {}
+        self._subscriptions: dict[str, Callable[[], None] | None] = {}
+        self._last_payloads: dict[str, str] = {} # Letzter empfangener Wert pro Suffix
+        self._delivered_payloads: dict[str, str] = {} # Letzter an die Listener verteilter Wert pro Suffix
+        # Staleness-Erkennung: Loop-Zeit der letzten Nachricht, egal auf welchem State-Topic
+        self.last_seen = hass.loop.time()
+        self.stale = False
+        self._limiter: EspuinoFloodLimiter | None = None
+        self._flap_damper = EspuinoFlapDamper(
+            hass, self.device_name, self._async_online_released, self._async_unstable_changed
+        )
+        # Nach einem Broker-Reconnect: neueste Nachricht pro Suffix, bis das Resync-Fenster schließt
+        self._resync_pending: dict[str, Any] | None = None
+        self.resync_received = 0
+        self.resync_dispatched = 0
+        self.qos: dict[str, int] = {}
+        self.delivery = EspuinoDeliveryTracker(hass)
+        self._apply_basic_options()
+
+    async def async_setup(self) -> None:
+        """Load persisted data before the platforms are set up."""
+        await self.library.async_load()
+        await self.stats.async_load()
+        self._catalog = await async_get_catalog(self.hass)
+
+    async def async_start(self) -> None:
+        """Start the hub's own subscriptions and timers (after the platforms are set up)."""
+        self.entry.async_on_unload(self.async_stop)
+        # Nutzungsstatistik wird aus denselben Hub-Listenern gespeist wie die Entitäten
+        self.stats.async_start()
+        for suffix, msg_callback in (
+            (STATE_SUFFIX_PLAYBACK_STATE, self.stats.async_playback_received),
+            (STATE_SUFFIX_TRACK, self.stats.async_track_received),
+            (STATE_SUFFIX_RFID, self.stats.async_rfid_received),
+            (STATE_SUFFIX_ONLINE_STATE, self._online_message_received),
+        ):
+            self._unsubscribes.append(await self.async_subscribe(suffix, msg_callback))
+        # Echo-Topics aller verfolgten Befehle, auch ohne Entität dafür (Sleep, RepeatMode)
+        for suffix in ECHO_SUFFIXES:
+            self._unsubscribes.append(await self.async_subscribe(suffix, self._echo_message_received))
+        await self._async_apply_features()
+        self._apply_watchdog()
+        async_get_resync(self.hass).async_register(self)
+
+    @callback
+    def async_stop(self) -> None:
+        """Remove the hub's own subscriptions and timers."""
+        # Zuerst: das Ausliefern zurückgehaltener Nachrichten läuft über _dispatch
+        # und könnte sonst Statistik oder Flap-Dämpfung nach deren Stopp wieder anstoßen
+        if self._limiter is not None:
+            self._limiter.async_stop()
+            self._limiter = None
+        for unsubscribe in self._feature_unsubscribes.values():
+            unsubscribe()
+        self._feature_unsubscribes.clear()
+        while self._unsubscribes:
+            self._unsubscribes.pop()()
+        self.stats.async_stop()
+        self._flap_damper.async_stop()
+        async_get_watchdog(self.hass).async_unregister(self)
+        async_get_resync(self.hass).async_unregister(self)
+        self._resync_pending = None
+
+    async def async_update_options(self) -> None:
+        """Apply changed options to the running device without reloading the entry.
+
+        Entities stay in place; only subscriptions and timers whose settings
+        actually changed are touched.
+        """
+        _LOGGER.debug("Applying new options for %s: %s", self.device_name, self.entry.options)
+        old_qos = self.qos
+        self._apply_basic_options()
+        self._apply_watchdog()
+        await self._async_apply_features()
+        changed = {topic_class for topic_class, qos in self.qos.items() if old_qos.get(topic_class) != qos}
+        if changed:
+            await self._async_resubscribe(changed)
+        async_dispatcher_send(self.hass, SIGNAL_OPTIONS_UPDATED.format(self.device_name))
+
+    def _apply_basic_options(self) -> None:
+        """Apply options that need no subscription changes."""
+        options = self.entry.options
+        # Relative Pfade beziehen sich auf das HA-Config-Verzeichnis
+        self.cover_art_dir = self.hass.config.path(options.get(CONF_COVER_ART_DIR, DEFAULT_COVER_ART_DIR))
+
+        self.qos = qos_from_options(options)
+
+        max_rate = options.get(CONF_MAX_RATE, DEFAULT_MAX_RATE)
+        if self._limiter is not None and self._limiter.rate != max_rate:
+            self._limiter.async_stop() # Zurückgehaltene Nachrichten werden noch zugestellt
+            self._limiter = None
+        if self._limiter is None and max_rate > 0:
+            self._limiter = EspuinoFloodLimiter(self.hass, self.device_name, max_rate)
+
+    @callback
+    def _apply_watchdog(self) -> None:
+        stale_timeout = self.entry.options.get(CONF_STALE_TIMEOUT, DEFAULT_STALE_TIMEOUT)
+        if stale_timeout <= 0:
+            self.async_set_stale(False)
+        async_get_watchdog(self.hass).async_register(self, stale_timeout * 60)
+
+    async def _async_apply_features(self) -> None:
+        """Subscribe or unsubscribe the topics of feature groups that were switched."""
+        features = set(self.entry.options.get(CONF_FEATURES, DEFAULT_FEATURES))
+        self.features = features
+        wanted = {
+            FEATURE_RFID_EVENTS: lambda: self.async_subscribe(STATE_SUFFIX_RFID, self._rfid_message_received),
+            FEATURE_SNAPSHOT: lambda: self._async_mqtt_subscribe(
+                STATE_SUFFIX_SNAPSHOT, self._snapshot_message_received
+            ),
+        }
+        for feature, subscribe in wanted.items():
+            active = feature in self._feature_unsubscribes
+            if feature in features and not active:
+                self._feature_unsubscribes[feature] = await subscribe()
+            elif feature not in features and active:
+                self._feature_unsubscribes.pop(feature)()
+
+    async def async_subscribe(self, suffix: str, msg_callback: Callable[[Any], None]) -> Callable[[], None]:
+        """Register a callback for a state suffix and return a function to remove it.
+
+        All callbacks of a suffix share one MQTT subscription, which is
+        removed again together with the last callback. A callback joining
+        an existing subscription gets the last value the other callbacks
+        received right away, the broker only sends retained messages to new
+        subscriptions.
+        """
+        listeners = self._listeners.setdefault(suffix, [])
+        listeners.append(msg_callback)
+        if (payload := self._delivered_payloads.get(suffix)) is not None:
+            # Z.B. Plattformen, die erst nach dem Start geladen werden
+            msg_callback(SnapshotMessage(self.state_topic(suffix), payload, self.qos[state_topic_class(suffix)], True))
+        if suffix not in self._subscriptions:
+            self._subscriptions[suffix] = None # Reserviert, während die Subscription aufgebaut wird
+            unsubscribe = await self._async_mqtt_subscribe(suffix, self._message_received)
+            if listeners and self._listeners.get(suffix) is listeners:
+                self._subscriptions[suffix] = unsubscribe
+            else:
+                unsubscribe() # Während des Abonnierens schon wieder abgemeldet
+
+        @callback
+        def async_remove() -> None:
+            listeners.remove(msg_callback)
+            if not listeners:
+                self._listeners.pop(suffix, None)
+                if unsubscribe := self._subscriptions.pop(suffix, None):
+                    unsubscribe()
+
+        return async_remove
+
+    async def _async_mqtt_subscribe(self, suffix: str, msg_callback: Callable[[Any], None]) -> Callable[[], None]:
+        """Subscribe a state topic with the QoS of its topic class."""
+        return await mqtt_async_subscribe(
+            self.hass, self.state_topic(suffix), msg_callback, qos=self.qos[state_topic_class(suffix)]
+        )
+
+    async def _async_resubscribe(self, topic_classes: set[str]) -> None:
+        """Renew the subscriptions of the given topic classes with their new QoS."""
+        for suffix, unsubscribe in list(self._subscriptions.items()):
+            if unsubscribe is None or state_topic_class(suffix) not in topic_classes:
+                continue
+            # Erst neu abonnieren, dann das alte Abo lösen, damit keine Nachricht verloren geht
+            new_unsubscribe = await self._async_mqtt_subscribe(suffix, self._message_received)
+            if self._subscriptions.get(suffix) is unsubscribe:
+                self._subscriptions[suffix] = new_unsubscribe
+                unsubscribe()
+            else:
+                new_unsubscribe() # Inzwischen vom letzten Listener abgemeldet
+
+        if state_topic_class(STATE_SUFFIX_SNAPSHOT) in topic_classes and FEATURE_SNAPSHOT in self._feature_unsubscribes:
+            new_unsubscribe = await self._async_mqtt_subscribe(STATE_SUFFIX_SNAPSHOT, self._snapshot_message_received)
+            if (unsubscribe := self._feature_unsubscribes.get(FEATURE_SNAPSHOT)) is not None:
+                self._feature_unsubscribes[FEATURE_SNAPSHOT] = new_unsubscribe
+                unsubscribe()
+            else:
+                new_unsubscribe()
+
+    async def async_publish(self, suffix: str, payload: str, qos: int | None = None, retain: bool = False) -> None:
+        """Publish a command with the QoS of its topic class and count it for delivery tracking.
+
+        Commands are not retained by default, a retained command would be
+        executed again whenever the device reconnects.
+        """
+        if qos is None:
+            qos = self.qos[command_topic_class(suffix)]
+        await mqtt_async_publish(self.hass, self.command_topic(suffix), payload, qos, retain)
+        self.delivery.async_sent(suffix)
+
+    @callback
+    def async_touch(self) -> None:
+        """Record that the device just sent something."""
+        self.last_seen = self.hass.loop.time()
+        if self.stale:
+            self.async_set_stale(False)
+            async_get_watchdog(self.hass).async_requeue(self)
+
+    @callback
+    def async_set_stale(self, stale: bool) -> None:
+        """Mark the device as silent (or alive again) and let its entities update."""
+        if stale == self.stale:
+            return
+        self.stale = stale
+        if stale:
+            self.stats.async_set_playing(False)
+        async_dispatcher_send(self.hass, SIGNAL_AVAILABILITY.format(self.device_name))
+
+    @callback
+    def _message_received(self, msg) -> None:
+        """Fan out a per-topic message to the callbacks of its suffix."""
+        self.async_touch()
+        suffix = msg.topic.rsplit("/", 1)[-1]
+        self._last_payloads[suffix] = msg.payload
+        self.delivery.async_received(suffix)
+        # Flood-Schutz: über dem Budget wird nur die neueste Nachricht verzögert zugestellt
+        if self._limiter is None or self._limiter.async_allow(suffix, msg, self._dispatch):
+            self._dispatch(suffix, msg)
+
+    @callback
+    def _online_message_received(self, msg) -> None:
+        if msg.payload == PAYLOAD_OFFLINE:
+            self.stats.async_set_playing(False) # Ohne Gerät keine Wiedergabe
+
+    @callback
+    def async_begin_resync(self) -> None:
+        """Collect instead of dispatch until async_end_resync (broker reconnected)."""
+        if self._resync_pending is None:
+            self._resync_pending = {}
+
+    @callback
+    def async_end_resync(self) -> None:
+        """Dispatch one coalesced message per suffix collected during the resync window."""
+        pending, self._resync_pending = self._resync_pending, None
+        if not pending:
+            return
+        self.resync_dispatched += len(pending)
+        for suffix, msg in pending.items():
+            self._dispatch(suffix, msg)
+
+    @callback
+    def _echo_message_received(self, msg) -> None:
+        """Nothing to do, _message_received already counted the echo for delivery tracking."""
+
+    @callback
+    def _dispatch(self, suffix: str, msg) -> None:
+        if self._resync_pending is not None:
+            # Replay nach Broker-Reconnect: nur der neueste Wert pro Suffix wird später verteilt
+            self._resync_pending[suffix] = msg
+            self.resync_received += 1
+            return
+        # Flattert die Verbindung, wird der Online-Zustand festgehalten statt jeden Wechsel zu verteilen
+        if suffix == STATE_SUFFIX_ONLINE_STATE and not self._flap_damper.async_allow(msg):
+            return
+        self._fan_out(suffix, msg)
+
+    @callback
+    def _fan_out(self, suffix: str, msg) -> None:
+        # Nach Flood-Schutz, Resync-Fenster und Flap-Dämpfung, das bekommen auch spätere Listener
+        self._delivered_payloads[suffix] = msg.payload
+        for msg_callback in tuple(self._listeners.get(suffix, ())):
+            msg_callback(msg)
+
+    @callback
+    def _async_online_released(self, msg) -> None:
+        """Deliver the online state held back while the device was flapping."""
+        self._fan_out(STATE_SUFFIX_ONLINE_STATE, msg)
+
+    @callback
+    def _async_unstable_changed(self) -> None:
+        async_dispatcher_send(self.hass, SIGNAL_UNSTABLE.format(self.device_name))
+
+    @property
+    def unstable(self) -> bool:
+        """Return True while the device's online state is held because it flaps."""
+        return self._flap_damper.unstable
+
+    @callback
+    def _snapshot_message_received(self, msg) -> None:
+        """Parse the combined snapshot once and dispatch only the changed fields."""
+        self.async_touch()
+        if self._limiter is None or self._limiter.async_allow(STATE_SUFFIX_SNAPSHOT, msg, self._process_snapshot):
+            self._process_snapshot(STATE_SUFFIX_SNAPSHOT, msg)
+
+    @callback
+    def _process_snapshot(self, _suffix: str, msg) -> None:
+        try:
+            snapshot = json_loads(msg.payload)
+        except ValueError:
+            _LOGGER.warning("Invalid snapshot payload from %s: %s", self.device_name, msg.payload)
+            return
+        if not isinstance(snapshot, dict):
+            _LOGGER.warning("Snapshot from %s is not a JSON object: %s", self.device_name, msg.payload)
+            return
+
+        for suffix, value in snapshot.items():
+            if isinstance(value, (dict, list)) or value is None:
+                continue
+            if isinstance(value, bool):
+                payload = "ON" if value else "OFF"
+            else:
+                payload = str(value)
+            if self._last_payloads.get(suffix) == payload:
+                continue
+            self._last_payloads[suffix] = payload
+            # Im Sammel-Topic stehen immer alle Felder, als Bestätigung zählt nur eine Änderung
+            self.delivery.async_received(suffix)
+            if suffix not in self._listeners:
+                continue
+            self._dispatch(suffix, SnapshotMessage(self.state_topic(suffix), payload, msg.qos, msg.retain))
+
+    def state_topic(self, state_topic_suffix_const: str) -> str:
+        """Construct the full MQTT state topic of this device."""
+        return f"{self.device_name}/{DEFAULT_MQTT_STATE_TOPIC}/{state_topic_suffix_const}"
+
+    def command_topic(self, command_topic_suffix_const: str) -> str:
+        """Construct the full MQTT command topic of this device."""
+        return f"{self.device_name}/{DEFAULT_MQTT_BASE_TOPIC}/{command_topic_suffix_const}"
+
+    @property
+    def device_id(self) -> str | None:
+        """Return the device registry ID of this ESPuino."""
+        if self._device_id is None:
+            device = dr.async_get(self.hass).async_get_device(identifiers={(DOMAIN, self.device_name)})
+            if device is not None:
+                self._device_id = device.id
+        return self._device_id
+
+    @callback
+    def _rfid_message_received(self, msg) -> None:
+        """Fire every scan as event and device trigger, also repeated scans of the same card."""
+        if msg.retain:
+            return # Gespeicherter Wert beim (Neu-)Abonnieren, kein neuer Scan
+        card_id = msg.payload.strip()
+        if not card_id or card_id == "0":
+            return
+        card = self._catalog.get(card_id)
+        event_data = {
+            "device_id": self.device_id,
+            "device_name": self.device_name,
+            ATTR_CARD_ID: card_id,
+            ATTR_LABEL: card.get("label") if card else None,
+        }
+        self.hass.bus.async_fire(EVENT_RFID_SCANNED, event_data)
+        async_get_rfid_triggers(self.hass).async_dispatch(self.device_name, card_id, event_data)
@@ -0,0 +1,126 @@
+"""Per-device index of the tracks an ESPuino has played."""
+import logging
+import re
+import sys
+from typing import NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import STORAGE_KEY_LIBRARY, STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+SAVE_DELAY = 60 # Sekunden
+MAX_TRACKS = 20000 # Obergrenze pro Gerät, darüber wird nur noch geparst, nicht gespeichert
+AUDIO_EXTENSIONS = ("mp3", "wav", "ogg", "flac")
+
+_TRACK_NUMBERS_RE = re.compile(r'\((\d+)/(\d+)\):\s*(.*)')
+
+
+class TrackInfo(NamedTuple):
+    """Metadata derived from one Track payload."""
+
+    title: str
+    folder: str | None
+    album: str | None
+    artist: str | None
+    track: int | None
+    playlist_size: int | None
+
+
+def parse_track_payload(payload: str) -> TrackInfo:
+    """Parse a Track payload like ``(1/12): /Artist/Album/Song.mp3``.
+
+    The folder layout ``.../<artist>/<album>/<file>`` is assumed for the
+    album and artist names.
+    """
+    track = playlist_size = None
+    path = payload
+    match_numbers = _TRACK_NUMBERS_RE.match(payload)
+    if match_numbers:
+        track = int(match_numbers.group(1))
+        playlist_size = int(match_numbers.group(2))
+        path = match_numbers.group(3)
+
+    if '/' not in path:
+        return TrackInfo(path, None, None, None, track, playlist_size)
+
+    folder, title = path.rsplit('/', 1)
+    # Entferne .mp3 oder andere Erweiterungen
+    title_parts = title.rsplit('.', 1)
+    if len(title_parts) > 1 and title_parts[1].lower() in AUDIO_EXTENSIONS:
+        title = title_parts[0]
+    parts = [part for part in folder.split('/') if part]
+    album = parts[-1] if parts else None
+    artist = parts[-2] if len(parts) > 1 else None
+    return TrackInfo(title, folder or None, album, artist, track, playlist_size)
+
+
+class EspuinoTrackLibrary:
+    """Incrementally built, persisted index of observed Track payloads.
+
+    Folder, album and artist strings are interned and referenced by integer
+    ID, so thousands of tracks from the same folders stay small. A lookup
+    for a payload that has been seen before is a single dict access.
+    """
+
+    def __init__(self, hass: HomeAssistant, device_name: str) -> None:
+        """Initialize the library."""
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_LIBRARY}.{device_name}")
+        self._strings: list[str | None] = [None] # ID 0 = kein Wert
+        self._string_ids: dict[str | None, int] = {None: 0}
+        # payload -> (title, folder_id, album_id, artist_id, track, playlist_size)
+        self._tracks: dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    async def async_load(self) -> None:
+        """Load the index from storage."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for value in data.get("strings", [])[1:]:
+            self._intern(value)
+        for payload, *fields in data.get("tracks", []):
+            self._tracks[payload] = tuple(fields)
+        _LOGGER.debug("Loaded %s tracks for %s from storage", len(self._tracks), self._store.key)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "strings": self._strings,
+            "tracks": [[payload, *fields] for payload, fields in self._tracks.items()],
+        }
+
+    def _intern(self, value: str | None) -> int:
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self._strings)
+            value = sys.intern(value)
+            self._strings.append(value)
+            self._string_ids[value] = string_id
+        return string_id
+
+    @callback
+    def async_lookup(self, payload: str) -> TrackInfo:
+        """Return the metadata for a Track payload, indexing it on first sight."""
+        fields = self._tracks.get(payload)
+        if fields is not None:
+            title, folder_id, album_id, artist_id, track, playlist_size = fields
+            strings = self._strings
+            info = TrackInfo(title, strings[folder_id], strings[album_id], strings[artist_id], track, playlist_size)
+        else:
+            info = parse_track_payload(payload)
+            if len(self._tracks) < MAX_TRACKS:
+                self._tracks[payload] = (
+                    info.title,
+                    self._intern(info.folder),
+                    self._intern(info.album),
+                    self._intern(info.artist),
+                    info.track,
+                    info.playlist_size,
+                )
+                self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return info
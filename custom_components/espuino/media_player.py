@@ -2,25 +2,46 @@
 import logging
 
 from homeassistant.components.media_player import (
+    BrowseMedia,
+    MediaClass,
     MediaPlayerEntity,
     MediaPlayerEntityFeature,
     MediaPlayerState, # Ab HA 2025.1, vorher STATE_... direkt
 )
+from homeassistant.components.media_player.errors import BrowseError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv, entity_platform
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+import voluptuous as vol
 
 from .const import (
     # Deine Cmnd-Topics
     TOPIC_SLEEP_CMND,
     TOPIC_TRACK_CONTROL_CMND,
     TOPIC_LOUDNESS_CMND,
+    TOPIC_RFID_CMND,
     # Deine State-Topic Suffixe
     STATE_SUFFIX_TRACK, # Hinzugefügt
     STATE_SUFFIX_LOUDNESS,
     STATE_SUFFIX_PLAYBACK_STATE, # Jetzt aus const.py
+    STATE_SUFFIX_RFID,
+    STATE_SUFFIX_PLAYMODE,
+    MEDIA_TYPE_RFID_CARD,
+    FEATURE_COVER_ART,
+    SIGNAL_OPTIONS_UPDATED,
+    SERVICE_FADE_VOLUME,
+    ATTR_LOUDNESS,
+    ATTR_DURATION,
+    MAX_LOUDNESS,
 )
+from .catalog import async_get_catalog
+from .cover_art import async_get_cover_cache, cover_keys
 from .entity import EspuinoMqttEntity # Deine Basis-Entität
+from .fade import async_get_fader
+from .library import TrackInfo
 
 from homeassistant.components.mqtt import async_subscribe as mqtt_async_subscribe # Import here
 
@@ -41,6 +62,10 @@ except ImportError:
         STATE_OFF as HA_STATE_OFF,
     )
 
+# media_content_id-Präfix für Gruppen im Media Browser ("prefix:<anfang>")
+BROWSE_PREFIX = "prefix:"
+BROWSE_LIMIT = 200 # Maximale Anzahl Einträge pro Browser-Ebene
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -55,6 +80,17 @@ async def async_setup_entry(
     player = EspuinoMediaPlayer(entry)
     async_add_entities([player])
 
+    # Lautstärke-Fade, z.B. zum Einschlafen von 12 auf 3 in 10 Minuten
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_FADE_VOLUME,
+        {
+            vol.Required(ATTR_LOUDNESS): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_LOUDNESS)),
+            vol.Required(ATTR_DURATION): cv.positive_time_period,
+        },
+        "async_fade_volume",
+    )
+
 
 class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
     """Representation of an ESPuino Media Player."""
@@ -67,6 +103,8 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         | MediaPlayerEntityFeature.PREVIOUS_TRACK
         | MediaPlayerEntityFeature.VOLUME_SET
         | MediaPlayerEntityFeature.TURN_OFF  # <--- HIER HINZUFÜGEN
+        | MediaPlayerEntityFeature.BROWSE_MEDIA
+        | MediaPlayerEntityFeature.PLAY_MEDIA
     )
 
     def __init__(self, entry: ConfigEntry):
@@ -81,6 +119,15 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         self._attr_media_track = None # Aktuelle Tracknummer
         # Weitere Attribute...
 
+        # Zuletzt gesehene Karte und Abspielmodus, um den Kartenkatalog zu füttern
+        self._catalog = None
+        self._current_rfid = None
+        self._current_play_mode = None
+        self._current_folder = None
+        self._cover_keys = () # Dateinamen, unter denen das Cover gesucht wird
+        self._cover_etag = None # Content-Hash des aktuellen Covers, None = kein Cover
+        self._cover_task = None # Laufende Cover-Suche
+
         # Topic-Konstanten direkt verwenden (wenn sie volle Pfade sind)
         self._state_suffix_track = STATE_SUFFIX_TRACK # Suffix
         self._state_suffix_loudness = STATE_SUFFIX_LOUDNESS # Suffix
@@ -94,6 +141,33 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
     async def async_added_to_hass(self) -> None:
         """Subscribe to MQTT events."""
         await super().async_added_to_hass() # Ruft ggf. Basis-Logik auf
+        self._catalog = await async_get_catalog(self.hass)
+
+        @callback
+        def rfid_state_message_received(msg):
+            """Remember the current card and record it in the catalog.
+
+            A retained value (HA restart, late listener) is the card that was
+            already inserted, it does not count as a new use.
+            """
+            payload = msg.payload.strip()
+            _LOGGER.debug("MediaPlayer: RFID state received on topic '%s': %s", msg.topic, payload)
+            if not payload or payload == "0":
+                return
+            self._current_rfid = payload
+            self._catalog.async_learn(
+                payload, self._device_name, play_mode=self._current_play_mode, used=not msg.retain
+            )
+            self._async_update_cover()
+
+        @callback
+        def playmode_state_message_received(msg):
+            """Remember the play mode of the current card."""
+            self._current_play_mode = msg.payload.strip() or None
+            if self._current_rfid is not None and self._current_play_mode is not None:
+                self._catalog.async_learn(
+                    self._current_rfid, self._device_name, play_mode=self._current_play_mode, used=False
+                )
 
         @callback
         def playback_state_message_received(msg):
@@ -125,55 +199,37 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
             # Der _attr_state wird hauptsächlich durch playback_state_message_received gesetzt.
             # Dies ist der komplexe Teil ohne expliziten Playback-Status-Topic
             if payload and payload.strip(): # Prüfen, ob Payload nicht leer oder nur Whitespace ist
-                # Verbessertes, aber immer noch beispielhaftes Parsen
+                # Metadaten kommen aus dem Track-Index des Geräts: bekannte Payloads
+                # sind ein Dict-Lookup, neue werden einmalig geparst und gemerkt.
                 try:
-                    # Beispiel: "(1/12): Song Title.mp3" oder "/path/to/Song Title.mp3"
-                    # oder "1 - Song Title" (wenn Nummer und Titel anders getrennt sind)
-                    
-                    # Alte Werte speichern, um tatsächliche Änderungen zu erkennen
-                    # old_media_title = self._attr_media_title # Nicht direkt benötigt, da wir direkt vergleichen
-                    # old_media_track = self._attr_media_track # Nicht direkt benötigt
-
-                    # Versuche, Track-Nummer und Gesamt-Tracks zu extrahieren, falls vorhanden
-                    import re
-                    match_numbers = re.match(r'\((\d+)/(\d+)\):\s*(.*)', payload)
-                    
-                    if match_numbers:
-                        new_track_val = int(match_numbers.group(1))
-                        if self._attr_media_track != new_track_val:
-                            self._attr_media_track = new_track_val
-                            local_changes_made = True
-                        # self._attr_media_playlist_size = int(match_numbers.group(2)) # Wenn benötigt
-                        remaining_payload = match_numbers.group(3)
-                    else:
-                        # Wenn keine Track-Nummer im Payload, aber vorher eine da war, zurücksetzen
-                        if self._attr_media_track is not None:
-                            self._attr_media_track = None
-                            local_changes_made = True
-                        remaining_payload = payload
-
-                    # Extrahiere den Titel (oft der Dateiname ohne Pfad)
-                    new_title_val = self._attr_media_title # Behalte alten Titel, falls nicht geändert
-                    if '/' in remaining_payload:
-                        new_title_val = remaining_payload.split('/')[-1]
-                        # Entferne .mp3 oder andere Erweiterungen, falls gewünscht
-                        title_parts = new_title_val.rsplit('.', 1)
-                        if len(title_parts) > 1 and title_parts[1].lower() in ['mp3', 'wav', 'ogg', 'flac']:
-                            new_title_val = title_parts[0]
-                    else:
-                        new_title_val = remaining_payload
-                    
-                    if self._attr_media_title != new_title_val:
-                        self._attr_media_title = new_title_val
-                        local_changes_made = True
-
+                    info = self._hub.library.async_lookup(payload)
                 except Exception as e:
                     _LOGGER.error("Error parsing track state '%s': %s", payload, e)
-                    # Fallback: Setze rohen Payload als Titel, wenn Parsing fehlschlägt und Titel sich ändert
-                    if self._attr_media_title != payload:
-                        self._attr_media_title = payload
+                    # Fallback: Setze rohen Payload als Titel, wenn Parsing fehlschlägt
+                    info = TrackInfo(payload, None, None, None, None, None)
+
+                new_values = {
+                    "_attr_media_title": info.title,
+                    "_attr_media_album_name": info.album,
+                    "_attr_media_artist": info.artist,
+                    "_attr_media_track": info.track,
+                }
+                for attr, value in new_values.items():
+                    if getattr(self, attr) != value:
+                        setattr(self, attr, value)
                         local_changes_made = True
-                
+                # Restliche Werte des Track-Sensors, damit er im schlanken Profil entfallen kann
+                if self._attr_extra_state_attributes.get("playlist_size") != info.playlist_size:
+                    self._attr_extra_state_attributes["playlist_size"] = info.playlist_size
+                    local_changes_made = True
+
+                if self._current_rfid is not None and info.folder:
+                    # Ordner der aktuellen Karte im Katalog vermerken
+                    self._catalog.async_learn(self._current_rfid, self._device_name, folder=info.folder, used=False)
+                if info.folder != self._current_folder:
+                    self._current_folder = info.folder
+                    self._async_update_cover()
+
             else: # Leerer Payload für Track
                 # Metadaten löschen, wenn sie vorher gesetzt waren
                 if self._attr_media_title is not None: self._attr_media_title = None; local_changes_made = True
@@ -197,8 +253,15 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
             payload = msg.payload
             _LOGGER.debug("MediaPlayer: Loudness state received on topic '%s': %s", msg.topic, payload)
             try:
+                level = int(payload)
+                fader = async_get_fader(self.hass)
+                if fader.is_fading(self) and not fader.async_is_own_echo(self, level):
+                    # Lautstärke wurde am Gerät verstellt, der Fade gibt nach
+                    _LOGGER.debug("MediaPlayer: Loudness changed to %s on the device, cancelling fade", level)
+                    fader.async_cancel(self)
                 # ESPuino sendet 0-21, HA erwartet 0.0-1.0
-                new_volume = min(1.0, max(0.0, int(payload) / 21.0))
+                new_volume = min(1.0, max(0.0, level / 21.0))
+                self._attr_extra_state_attributes["loudness"] = level # ESPuino-Stufe, wie der Lautstärke-Sensor
                 self._attr_volume_level = new_volume
                 _LOGGER.debug("MediaPlayer: New volume_level: %s", self._attr_volume_level)
             except ValueError:
@@ -212,6 +275,65 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         await self.async_subscribe_to_topic(self._state_suffix_track, track_state_message_received)
         await self.async_subscribe_to_topic(self._state_suffix_loudness, loudness_state_message_received)
         await self.async_subscribe_to_topic(self._state_suffix_playback_state, playback_state_message_received)
+        await self.async_subscribe_to_topic(STATE_SUFFIX_RFID, rfid_state_message_received)
+        await self.async_subscribe_to_topic(STATE_SUFFIX_PLAYMODE, playmode_state_message_received)
+
+        @callback
+        def options_updated():
+            """Look the cover up again, the directory or the cover feature may have changed."""
+            self._cover_keys = None # Erzwingt eine neue Suche, auch ohne neue Schlüssel
+            self._async_update_cover()
+
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_OPTIONS_UPDATED.format(self._device_name), options_updated)
+        )
+        self.async_on_remove(self._async_cancel_cover)
+
+    @callback
+    def _async_cancel_cover(self) -> None:
+        """Stop a running cover lookup, its result is no longer wanted."""
+        if self._cover_task is not None and not self._cover_task.done():
+            self._cover_task.cancel()
+        self._cover_task = None
+
+    @callback
+    def _async_update_cover(self) -> None:
+        """Look up the cover for the current card/folder in the background."""
+        if FEATURE_COVER_ART in self._hub.features:
+            keys = cover_keys(self._current_rfid, self._current_folder)
+        else:
+            keys = () # Cover-Funktion in den Optionen abgeschaltet
+        if keys != self._cover_keys:
+            self._cover_keys = keys
+            self._async_cancel_cover()
+            self._cover_task = self.hass.async_create_background_task(
+                self._async_load_cover(keys), f"espuino cover {self._device_name}"
+            )
+
+    async def _async_load_cover(self, keys: tuple[str, ...]) -> None:
+        art = await async_get_cover_cache(self.hass).async_get(self._hub.cover_art_dir, keys)
+        if keys != self._cover_keys:
+            return # Inzwischen läuft schon etwas anderes
+        etag = art.etag if art is not None else None
+        if etag != self._cover_etag:
+            self._cover_etag = etag
+            self.async_write_ha_state()
+
+    @property
+    def media_image_hash(self) -> str | None:
+        """Content hash of the cover, used by HA as cache key for the image proxy."""
+        return self._cover_etag
+
+    async def async_get_media_image(self) -> tuple[bytes | None, str | None]:
+        """Serve the cover from the local cover cache."""
+        art = await async_get_cover_cache(self.hass).async_get(self._hub.cover_art_dir, self._cover_keys)
+        if art is None:
+            return None, None
+        if art.etag != self._cover_etag:
+            # Bild wurde auf der Platte ersetzt: neuer Hash, damit Browser nicht das alte zeigen
+            self._cover_etag = art.etag
+            self.async_write_ha_state()
+        return art.content, art.content_type
 
     def _update_state(self, new_state: MediaPlayerState | None):
         """Update player state and associated metadata."""
@@ -244,6 +366,13 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         self._attr_media_artist = None
         self._attr_media_album_name = None
         self._attr_media_track = None
+        self._attr_extra_state_attributes.pop("loudness", None)
+        self._attr_extra_state_attributes.pop("playlist_size", None)
+        self._current_rfid = None
+        self._current_folder = None
+        self._cover_keys = ()
+        self._cover_etag = None
+        async_get_fader(self.hass).async_cancel(self)
 
     @callback
     def _restore_entity_state(self):
@@ -263,8 +392,27 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         # Stelle sicher, dass das Ergebnis im Bereich 0-21 bleibt.
         espuino_volume = max(0, min(21, int(volume * 21 + 0.5)))
         _LOGGER.debug("Setting ESPuino volume to: %s (from HA: %s)", espuino_volume, volume)
+        async_get_fader(self.hass).async_cancel(self) # Manuelle Änderung beendet einen laufenden Fade
         await self.async_publish_mqtt(self._topic_loudness_cmnd, str(espuino_volume)) # Suffix hier
 
+    async def async_fade_volume(self, loudness: int, duration) -> None:
+        """Fade the volume to an ESPuino loudness level (0-21) over a duration."""
+        if self._attr_volume_level is None:
+            start_level = loudness # Aktuelle Lautstärke unbekannt, direkt setzen
+        else:
+            start_level = round(self._attr_volume_level * MAX_LOUDNESS)
+        async_get_fader(self.hass).async_start(self, start_level, loudness, duration.total_seconds())
+
+    @callback
+    def async_fade_step(self, level: int) -> None:
+        """Publish one level of a running fade."""
+        self.hass.async_create_task(self.async_publish_mqtt(self._topic_loudness_cmnd, str(level)))
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop a running fade."""
+        async_get_fader(self.hass).async_cancel(self)
+        await super().async_will_remove_from_hass()
+
     async def async_media_play(self) -> None:
         """Send play command."""
         await self.async_publish_mqtt(self._topic_track_control_cmnd, "3") # 3 = Play/Pause
@@ -303,6 +451,62 @@ class EspuinoMediaPlayer(EspuinoMqttEntity, MediaPlayerEntity):
         self._attr_state = HA_STATE_OFF
         self.async_write_ha_state()
 
+    async def async_play_media(self, media_type: str, media_id: str, **kwargs) -> None:
+        """Start the content of an RFID card on the ESPuino."""
+        _LOGGER.debug("MediaPlayer: Playing RFID card %s (type %s)", media_id, media_type)
+        # Nur Karten-IDs an das Gerät schicken, z.B. keine URLs aus anderen Medienquellen
+        if media_type != MEDIA_TYPE_RFID_CARD and self._catalog.get(media_id) is None:
+            raise HomeAssistantError(f"Unsupported media type {media_type}, only RFID cards can be played")
+        await self.async_publish_mqtt(TOPIC_RFID_CMND, media_id)
+
+    async def async_browse_media(
+        self, media_content_type: str | None = None, media_content_id: str | None = None
+    ) -> BrowseMedia:
+        """Browse the RFID card catalog.
+
+        Served entirely from the in-memory catalog index, the device itself
+        is never queried.
+        """
+        prefix = ""
+        if media_content_id:
+            if not media_content_id.startswith(BROWSE_PREFIX):
+                raise BrowseError(f"Unknown media_content_id: {media_content_id}")
+            prefix = media_content_id[len(BROWSE_PREFIX):]
+
+        groups, cards = self._catalog.browse(prefix, self._device_name, BROWSE_LIMIT)
+        children = [
+            BrowseMedia(
+                media_class=MediaClass.DIRECTORY,
+                media_content_id=f"{BROWSE_PREFIX}{group}",
+                media_content_type=MEDIA_TYPE_RFID_CARD,
+                title=f"{group.upper()}…",
+                can_play=False,
+                can_expand=True,
+            )
+            for group in groups
+        ]
+        children.extend(
+            BrowseMedia(
+                media_class=MediaClass.PLAYLIST,
+                media_content_id=card["id"],
+                media_content_type=MEDIA_TYPE_RFID_CARD,
+                title=card.get("label") or card["id"],
+                can_play=True,
+                can_expand=False,
+            )
+            for card in cards
+        )
+        return BrowseMedia(
+            media_class=MediaClass.DIRECTORY,
+            media_content_id=f"{BROWSE_PREFIX}{prefix}",
+            media_content_type=MEDIA_TYPE_RFID_CARD,
+            title=f"{prefix.upper()}…" if prefix else "RFID Karten",
+            can_play=False,
+            can_expand=True,
+            children=children,
+            children_media_class=MediaClass.PLAYLIST if not groups else MediaClass.DIRECTORY,
+        )
+
     # Weitere Methoden wie async_mute_volume, async_select_source etc.
     # müssten implementiert werden, wenn _attr_supported_features dies anzeigt.
 
@@ -0,0 +1,185 @@
+"""Time-boxed cProfile of the integration's message and publish paths."""
+import cProfile
+from datetime import datetime
+import functools
+import io
+import logging
+import pstats
+import types
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DATA_PROFILER
+from .hub import EspuinoHub
+
+_LOGGER = logging.getLogger(__name__)
+
+# Hub-Methoden, über die jede eingehende Nachricht und jeder Befehl läuft
+PROFILED_METHODS = ("_dispatch", "_process_snapshot")
+PROFILED_COROUTINES = ("async_publish",)
+REPORT_FILTER = r"custom_components[\\/]espuino" # Nur Zeilen der Integration im Textbericht
+REPORT_LINES = 40
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> "EspuinoProfiler":
+    """Return the shared profiler."""
+    profiler = hass.data.get(DATA_PROFILER)
+    if profiler is None:
+        profiler = hass.data[DATA_PROFILER] = EspuinoProfiler(hass)
+    return profiler
+
+
+def _write_report(profile: cProfile.Profile, base_path: str) -> None:
+    """Write the raw pstats file and a text report. Runs in the executor."""
+    profile.dump_stats(f"{base_path}.prof")
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_FILTER, REPORT_LINES)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_FILTER, REPORT_LINES)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_callers(REPORT_FILTER, REPORT_LINES)
+    with open(f"{base_path}.txt", "w", encoding="utf-8") as file:
+        file.write(stream.getvalue())
+
+
+class EspuinoProfiler:
+    """Profiles the hub's dispatch and publish paths for a limited time.
+
+    While active, the profiled methods of EspuinoHub are replaced by
+    wrappers that switch cProfile on for the duration of the call (for
+    coroutines: for each step between awaits, so other tasks are not
+    counted). Afterwards the original methods are put back, so an
+    inactive profiler costs nothing.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler."""
+        self.hass = hass
+        self._profile: cProfile.Profile | None = None
+        self._originals: dict[str, object] = {}
+        self._depth = 0 # Verschachtelte Aufrufe (Snapshot -> Dispatch) schalten nur einmal ein/aus
+        self._unsub_timer = None
+        self._unsub_stop = None
+
+    @property
+    def active(self) -> bool:
+        """Return True while a profile is being recorded."""
+        return self._profile is not None
+
+    @callback
+    def async_start(self, seconds: int) -> None:
+        """Record a profile for the given number of seconds."""
+        profile = cProfile.Profile()
+        try:
+            # Ab Python 3.12 kann nur ein Profiler gleichzeitig laufen (z.B. HA-Integration "profiler")
+            profile.enable()
+            profile.disable()
+        except ValueError as err:
+            _LOGGER.error("Cannot start the ESPuino profiler: %s", err)
+            return
+        self._profile = profile
+        for name in PROFILED_METHODS:
+            original = self._originals[name] = getattr(EspuinoHub, name)
+            setattr(EspuinoHub, name, self._wrap(original))
+        for name in PROFILED_COROUTINES:
+            original = self._originals[name] = getattr(EspuinoHub, name)
+            setattr(EspuinoHub, name, self._wrap_coroutine(original))
+        _LOGGER.info("Profiling ESPuino message handling for %s s", seconds)
+        self._unsub_timer = async_call_later(self.hass, seconds, self._async_stop)
+        self._unsub_stop = self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_hass_stop)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Stop a running profile early and discard it, e.g. when the last ESPuino is unloaded."""
+        if self._async_restore() is not None:
+            _LOGGER.info("ESPuino profiling cancelled, no report written")
+
+    @callback
+    def _async_hass_stop(self, _event) -> None:
+        self._unsub_stop = None # listen_once hat sich schon selbst abgemeldet
+        self.async_cancel()
+
+    @callback
+    def _async_restore(self) -> cProfile.Profile | None:
+        """Put the original hub methods back and return the recorded profile."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if self._unsub_stop is not None:
+            self._unsub_stop()
+            self._unsub_stop = None
+        for name, original in self._originals.items():
+            setattr(EspuinoHub, name, original)
+        self._originals.clear()
+        profile, self._profile = self._profile, None
+        return profile
+
+    @callback
+    def _async_stop(self, _now) -> None:
+        self._unsub_timer = None # Timer ist gerade abgelaufen
+        profile = self._async_restore()
+        if profile is None:
+            return
+        base_path = self.hass.config.path(f"espuino_profile_{datetime.now():%Y%m%d_%H%M%S}")
+        self.hass.async_create_task(self._async_write(profile, base_path))
+
+    async def _async_write(self, profile: cProfile.Profile, base_path: str) -> None:
+        await self.hass.async_add_executor_job(_write_report, profile, base_path)
+        _LOGGER.info("ESPuino profile written to %s.prof and %s.txt", base_path, base_path)
+
+    def _enter(self) -> None:
+        self._depth += 1
+        if self._depth == 1:
+            self._profile.enable()
+
+    def _exit(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._profile.disable()
+
+    def _wrap(self, original):
+        profiler = self
+
+        @callback
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            if profiler._profile is None:
+                return original(*args, **kwargs) # Gerade beendet, Aufruf lief noch über den Wrapper
+            profiler._enter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                profiler._exit()
+
+        return wrapper
+
+    def _wrap_coroutine(self, original):
+        profiler = self
+
+        @functools.wraps(original)
+        async def wrapper(*args, **kwargs):
+            return await profiler._profiled_steps(original(*args, **kwargs))
+
+        return wrapper
+
+    @types.coroutine
+    def _profiled_steps(self, coro):
+        """Drive a coroutine and profile only its own steps between awaits."""
+        value, error = None, None
+        while True:
+            profiling = self._profile is not None
+            if profiling:
+                self._enter()
+            try:
+                yielded = coro.send(value) if error is None else coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if profiling:
+                    self._exit()
+            try:
+                value, error = (yield yielded), None
+            except BaseException as err:
+                value, error = None, err
@@ -0,0 +1,160 @@
+"""MQTT QoS per topic class and tracking of confirmed command deliveries."""
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    TOPIC_CLASS_TELEMETRY,
+    TOPIC_CLASS_STATE,
+    TOPIC_CLASS_CRITICAL,
+    CONF_QOS_TELEMETRY,
+    CONF_QOS_STATE,
+    CONF_QOS_CRITICAL,
+    DEFAULT_QOS_TELEMETRY,
+    DEFAULT_QOS_STATE,
+    DEFAULT_QOS_CRITICAL,
+    STATE_SUFFIX_LOUDNESS,
+    STATE_SUFFIX_WIFI_RSSI,
+    STATE_SUFFIX_TRACK,
+    STATE_SUFFIX_BATTERY_SOC,
+    STATE_SUFFIX_BATTERY_VOLTAGE,
+    STATE_SUFFIX_SLEEP_TIMER,
+    STATE_SUFFIX_SLEEP_STATE,
+    STATE_SUFFIX_RFID,
+    STATE_SUFFIX_PLAYBACK_STATE,
+    STATE_SUFFIX_LOCK_CONTROLS,
+    STATE_SUFFIX_REPEAT_MODE,
+    STATE_SUFFIX_LED_BRIGHTNESS,
+    TOPIC_SLEEP_CMND,
+    TOPIC_RFID_CMND,
+    TOPIC_TRACK_CONTROL_CMND,
+    TOPIC_LOUDNESS_CMND,
+    TOPIC_SLEEP_TIMER_CMND,
+    TOPIC_LOCK_CONTROLS_CMND,
+    TOPIC_REPEAT_MODE_CMND,
+    COMMAND_SUFFIX_LED_BRIGHTNESS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+ECHO_TIMEOUT = 10 # Sekunden, in denen ein Befehl durch eine State-Nachricht bestätigt sein muss
+
+# Option und Vorgabe pro Klasse
+QOS_OPTIONS = {
+    TOPIC_CLASS_TELEMETRY: (CONF_QOS_TELEMETRY, DEFAULT_QOS_TELEMETRY),
+    TOPIC_CLASS_STATE: (CONF_QOS_STATE, DEFAULT_QOS_STATE),
+    TOPIC_CLASS_CRITICAL: (CONF_QOS_CRITICAL, DEFAULT_QOS_CRITICAL),
+}
+
+# State-Topics mit hoher Rate; alle anderen gehören zur Klasse "state"
+TELEMETRY_STATE_SUFFIXES = {
+    STATE_SUFFIX_TRACK,
+    STATE_SUFFIX_LOUDNESS,
+    STATE_SUFFIX_WIFI_RSSI,
+    STATE_SUFFIX_BATTERY_SOC,
+    STATE_SUFFIX_BATTERY_VOLTAGE,
+    STATE_SUFFIX_SLEEP_TIMER,
+}
+
+# Command-Suffix -> (Klasse, State-Suffix, auf dem das Gerät die Ausführung meldet)
+COMMAND_TOPICS = {
+    TOPIC_SLEEP_CMND: (TOPIC_CLASS_CRITICAL, STATE_SUFFIX_SLEEP_STATE),
+    TOPIC_RFID_CMND: (TOPIC_CLASS_CRITICAL, STATE_SUFFIX_RFID),
+    TOPIC_SLEEP_TIMER_CMND: (TOPIC_CLASS_CRITICAL, STATE_SUFFIX_SLEEP_TIMER),
+    TOPIC_TRACK_CONTROL_CMND: (TOPIC_CLASS_STATE, STATE_SUFFIX_PLAYBACK_STATE),
+    TOPIC_LOUDNESS_CMND: (TOPIC_CLASS_STATE, STATE_SUFFIX_LOUDNESS),
+    TOPIC_LOCK_CONTROLS_CMND: (TOPIC_CLASS_STATE, STATE_SUFFIX_LOCK_CONTROLS),
+    TOPIC_REPEAT_MODE_CMND: (TOPIC_CLASS_STATE, STATE_SUFFIX_REPEAT_MODE),
+    COMMAND_SUFFIX_LED_BRIGHTNESS: (TOPIC_CLASS_STATE, STATE_SUFFIX_LED_BRIGHTNESS),
+}
+# Diese State-Topics abonniert der Hub immer, sonst könnte z.B. Sleep nie bestätigt werden
+ECHO_SUFFIXES = frozenset(echo_suffix for _topic_class, echo_suffix in COMMAND_TOPICS.values())
+
+
+def qos_from_options(options) -> dict[str, int]:
+    """Return the configured QoS of every topic class."""
+    return {
+        topic_class: int(options.get(option, default))
+        for topic_class, (option, default) in QOS_OPTIONS.items()
+    }
+
+
+def state_topic_class(suffix: str) -> str:
+    """Return the topic class of a state suffix."""
+    return TOPIC_CLASS_TELEMETRY if suffix in TELEMETRY_STATE_SUFFIXES else TOPIC_CLASS_STATE
+
+
+def command_topic_class(suffix: str) -> str:
+    """Return the topic class of a command suffix."""
+    return COMMAND_TOPICS.get(suffix, (TOPIC_CLASS_STATE, None))[0]
+
+
+class EspuinoDeliveryTracker:
+    """Counts sent commands and the state echoes that confirm them, per topic class.
+
+    A command counts as confirmed when any message arrives on its echo
+    topic within ``ECHO_TIMEOUT``. Expired commands are only counted when
+    the next command, echo or diagnostics request looks at them, so
+    tracking needs no timer.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the counters."""
+        self.hass = hass
+        self.sent = dict.fromkeys(QOS_OPTIONS, 0)
+        self.confirmed = dict.fromkeys(QOS_OPTIONS, 0)
+        self.unconfirmed = dict.fromkeys(QOS_OPTIONS, 0)
+        # Echo-Suffix -> [Klasse, offene Befehle, Frist]
+        self._pending: dict[str, list] = {}
+
+    @callback
+    def async_sent(self, command_suffix: str) -> None:
+        """Record a published command."""
+        topic_class, echo_suffix = COMMAND_TOPICS.get(command_suffix, (TOPIC_CLASS_STATE, None))
+        self.sent[topic_class] += 1
+        if echo_suffix is None:
+            return
+        now = self.hass.loop.time()
+        pending = self._pending.get(echo_suffix)
+        if pending is not None and pending[2] < now:
+            self._expire(echo_suffix)
+            pending = None
+        if pending is None:
+            self._pending[echo_suffix] = [topic_class, 1, now + ECHO_TIMEOUT]
+        else:
+            pending[1] += 1
+            pending[2] = now + ECHO_TIMEOUT
+
+    @callback
+    def async_received(self, suffix: str) -> None:
+        """Confirm the open commands whose echo topic just reported."""
+        pending = self._pending.pop(suffix, None)
+        if pending is None:
+            return
+        topic_class, count, deadline = pending
+        if deadline < self.hass.loop.time():
+            self.unconfirmed[topic_class] += count
+        else:
+            self.confirmed[topic_class] += count
+
+    def _expire(self, echo_suffix: str) -> None:
+        topic_class, count, _deadline = self._pending.pop(echo_suffix)
+        self.unconfirmed[topic_class] += count
+
+    def as_dict(self) -> dict:
+        """Return the counters per topic class."""
+        now = self.hass.loop.time()
+        for echo_suffix in [suffix for suffix, pending in self._pending.items() if pending[2] < now]:
+            self._expire(echo_suffix)
+        pending = dict.fromkeys(QOS_OPTIONS, 0)
+        for topic_class, count, _deadline in self._pending.values():
+            pending[topic_class] += count
+        return {
+            topic_class: {
+                "sent": self.sent[topic_class],
+                "confirmed": self.confirmed[topic_class],
+                "unconfirmed": self.unconfirmed[topic_class],
+                "pending": pending[topic_class],
+            }
+            for topic_class in QOS_OPTIONS
+        }
@@ -0,0 +1,133 @@
+"""Inbound flood protection: token bucket per device and topic."""
+from collections import deque
+from collections.abc import Callable
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_call_at
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+BURST_SECONDS = 2 # Bucket-Größe = so viele Sekunden der erlaubten Rate
+ISSUE_THRESHOLD = 50 # Ab so vielen zusammengefassten Nachrichten im Fenster wird ein Reparatur-Hinweis erstellt
+ISSUE_WINDOW = 60 # Sekunden; ohne Zusammenfassung in diesem Fenster gilt das Topic wieder als ruhig
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated", "pending", "handler", "timer", "suppressed", "issue_raised")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.pending = None # Neueste zurückgehaltene Nachricht
+        self.handler = None
+        self.timer = None
+        self.suppressed: deque[float] = deque() # Zeitpunkte der zusammengefassten Nachrichten im Fenster
+        self.issue_raised = False
+
+
+class EspuinoFloodLimiter:
+    """Rate limiter for the inbound messages of one device.
+
+    Within budget a message passes straight through. Over budget only the
+    newest message per topic is kept and delivered as soon as the bucket
+    has a token again, so a misbehaving device costs at most ``rate``
+    state writes per topic and second.
+    """
+
+    def __init__(self, hass: HomeAssistant, device_name: str, rate: float) -> None:
+        """Initialize the limiter."""
+        self.hass = hass
+        self.device_name = device_name
+        self.rate = rate
+        self.burst = max(1.0, rate * BURST_SECONDS)
+        self._buckets: dict[str, _Bucket] = {}
+
+    @callback
+    def async_allow(self, topic: str, msg: Any, handler: Callable[[str, Any], None]) -> bool:
+        """Return True if msg may be handled now, otherwise keep it for a later flush."""
+        now = self.hass.loop.time()
+        bucket = self._buckets.get(topic)
+        if bucket is None:
+            bucket = self._buckets[topic] = _Bucket(self.burst, now)
+
+        if bucket.pending is None:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                self._async_check_calm(topic, bucket, now)
+                return True
+
+        # Über dem Budget: nur die neueste Nachricht behalten
+        if bucket.pending is not None:
+            bucket.suppressed.append(now)
+            self._expire_suppressed(bucket, now)
+        bucket.pending = msg
+        bucket.handler = handler
+        if bucket.timer is None:
+            flush_at = now + (1 - bucket.tokens) / self.rate
+            bucket.timer = async_call_at(self.hass, callback(lambda _now: self._async_flush(topic)), flush_at)
+        if len(bucket.suppressed) >= ISSUE_THRESHOLD and not bucket.issue_raised:
+            self._async_raise_issue(topic)
+            bucket.issue_raised = True
+        return False
+
+    @callback
+    def _async_flush(self, topic: str) -> None:
+        bucket = self._buckets[topic]
+        msg, handler = bucket.pending, bucket.handler
+        bucket.pending = bucket.handler = bucket.timer = None
+        bucket.tokens = 0 # Der Token, auf den gewartet wurde, wird jetzt verbraucht
+        bucket.updated = self.hass.loop.time()
+        self._async_check_calm(topic, bucket, bucket.updated)
+        if msg is not None:
+            handler(topic, msg)
+
+    @staticmethod
+    def _expire_suppressed(bucket: _Bucket, now: float) -> None:
+        while bucket.suppressed and bucket.suppressed[0] < now - ISSUE_WINDOW:
+            bucket.suppressed.popleft()
+
+    @callback
+    def _async_check_calm(self, topic: str, bucket: _Bucket, now: float) -> None:
+        """Withdraw the repair issue once nothing was suppressed for a whole window."""
+        self._expire_suppressed(bucket, now)
+        if bucket.issue_raised and not bucket.suppressed:
+            _LOGGER.info("%s no longer floods topic %s", self.device_name, topic)
+            self._async_delete_issue(topic)
+            bucket.issue_raised = False
+
+    @callback
+    def _async_raise_issue(self, topic: str) -> None:
+        _LOGGER.warning(
+            "%s floods topic %s, limiting it to %s messages per second", self.device_name, topic, self.rate
+        )
+        ir.async_create_issue(
+            self.hass,
+            DOMAIN,
+            f"inbound_flood_{self.device_name}_{topic}",
+            is_fixable=False,
+            severity=ir.IssueSeverity.WARNING,
+            translation_key="inbound_flood",
+            translation_placeholders={"device": self.device_name, "topic": topic, "rate": str(self.rate)},
+        )
+
+    @callback
+    def _async_delete_issue(self, topic: str) -> None:
+        ir.async_delete_issue(self.hass, DOMAIN, f"inbound_flood_{self.device_name}_{topic}")
+
+    @callback
+    def async_stop(self) -> None:
+        """Cancel the flush timers, deliver the messages that are still held back and withdraw the issues."""
+        for topic, bucket in list(self._buckets.items()):
+            if bucket.timer is not None:
+                bucket.timer()
+                self._async_flush(topic)
+            if bucket.issue_raised:
+                self._async_delete_issue(topic)
+                bucket.issue_raised = False
@@ -0,0 +1,132 @@
+"""Staggered resync of all ESPuinos after the MQTT broker reconnected."""
+import heapq
+import itertools
+import logging
+import random
+import time
+
+from homeassistant.components.mqtt import async_subscribe_connection_status, is_connected
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+
+from .const import DATA_RESYNC
+
+_LOGGER = logging.getLogger(__name__)
+
+RESYNC_WINDOW = 2.0 # Sekunden, in denen nach dem Reconnect pro Gerät gesammelt wird
+RESYNC_JITTER = 3.0 # Zusätzliche zufällige Verzögerung pro Gerät, verteilt die Flushes
+
+
+@callback
+def async_get_resync(hass: HomeAssistant) -> "EspuinoResyncCoordinator":
+    """Return the shared resync coordinator."""
+    resync = hass.data.get(DATA_RESYNC)
+    if resync is None:
+        resync = hass.data[DATA_RESYNC] = EspuinoResyncCoordinator(hass)
+    return resync
+
+
+class EspuinoResyncCoordinator:
+    """Spreads the replay burst after a broker reconnect over time.
+
+    When the connection to the broker comes back, every hub opens a resync
+    window and only keeps the newest message per topic. The windows close
+    at jittered times from one shared timer, so the devices flush their
+    coalesced state one after another instead of all at once.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the coordinator."""
+        self.hass = hass
+        # hub -> seq des gültigen Heap-Eintrags (None: kein Fenster offen); ältere Einträge werden übersprungen
+        self._hubs: dict[object, int | None] = {}
+        self._heap: list[tuple[float, int, object]] = [] # (Flush-Zeitpunkt, seq, hub)
+        self._seq = itertools.count()
+        self._timer = None
+        self._unsub_status = None
+        self._connected: bool | None = None # None: seit dem Start noch nie verbunden
+        self._reconnected_at: float | None = None
+        # Kennzahlen für die Diagnose
+        self.reconnects = 0
+        self.last_recovery_time: float | None = None # Sekunden vom Reconnect bis zum letzten Flush
+        self.peak_flush_time = 0.0 # Längster einzelner Flush in Sekunden (blockiert den Event-Loop)
+        self.peak_loop_lag = 0.0 # Größte Verspätung des Flush-Timers in Sekunden
+
+    @callback
+    def async_register(self, hub) -> None:
+        """Include a hub in resyncs after broker reconnects."""
+        self._hubs.setdefault(hub, None)
+        if self._unsub_status is None:
+            self._connected = True if is_connected(self.hass) else None
+            self._unsub_status = async_subscribe_connection_status(self.hass, self._async_connection_changed)
+
+    @callback
+    def async_unregister(self, hub) -> None:
+        """Stop including a hub; a pending heap entry is dropped lazily."""
+        self._hubs.pop(hub, None)
+        if not self._hubs and self._unsub_status is not None:
+            self._unsub_status()
+            self._unsub_status = None
+            self._connected = None
+
+    @callback
+    def _async_connection_changed(self, connected: bool) -> None:
+        was_connected = self._connected
+        if not connected:
+            if was_connected is not None:
+                self._connected = False # Nur ein Abbruch einer bestehenden Verbindung zählt
+            return
+        self._connected = True
+        if was_connected is not False:
+            return # Erste Verbindung nach dem Start, der Broker schickt ohnehin nur den aktuellen Stand
+        _LOGGER.debug("MQTT broker reconnected, resyncing %s ESPuinos", len(self._hubs))
+        self.reconnects += 1
+        now = self.hass.loop.time()
+        self._reconnected_at = now
+        for hub in self._hubs:
+            # Ein erneuter Reconnect im offenen Fenster verschiebt dessen Ende, statt ein zweites zu öffnen
+            hub.async_begin_resync()
+            seq = self._hubs[hub] = next(self._seq)
+            heapq.heappush(
+                self._heap,
+                (now + RESYNC_WINDOW + random.uniform(0, RESYNC_JITTER), seq, hub),
+            )
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._timer is not None:
+            self._timer()
+            self._timer = None
+        if self._heap:
+            self._timer = async_call_at(self.hass, self._async_flush_due, self._heap[0][0])
+
+    @callback
+    def _async_flush_due(self, _now=None) -> None:
+        """Close the resync windows that are due."""
+        self._timer = None
+        now = self.hass.loop.time()
+        if self._heap:
+            self.peak_loop_lag = max(self.peak_loop_lag, now - self._heap[0][0])
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, hub = heapq.heappop(self._heap)
+            if self._hubs.get(hub) != seq:
+                continue # Abgemeldet oder durch einen neueren Reconnect ersetzt
+            self._hubs[hub] = None
+            started = time.perf_counter()
+            hub.async_end_resync()
+            self.peak_flush_time = max(self.peak_flush_time, time.perf_counter() - started)
+        if not self._heap and self._reconnected_at is not None:
+            self.last_recovery_time = self.hass.loop.time() - self._reconnected_at
+            self._reconnected_at = None
+            _LOGGER.debug("Resync after broker reconnect finished in %.1f s", self.last_recovery_time)
+        self._async_schedule()
+
+    def as_dict(self) -> dict:
+        """Return the resync metrics."""
+        return {
+            "reconnects": self.reconnects,
+            "last_recovery_time_s": None if self.last_recovery_time is None else round(self.last_recovery_time, 2),
+            "peak_flush_time_ms": round(self.peak_flush_time * 1000, 1),
+            "peak_loop_lag_ms": round(self.peak_loop_lag * 1000, 1),
+        }
@@ -0,0 +1,54 @@
+"""Dispatch of RFID scans to device trigger subscribers."""
+from collections.abc import Callable
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_RFID_TRIGGERS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_rfid_triggers(hass: HomeAssistant) -> "EspuinoRfidTriggers":
+    """Return the shared RFID trigger registry."""
+    triggers = hass.data.get(DATA_RFID_TRIGGERS)
+    if triggers is None:
+        triggers = hass.data[DATA_RFID_TRIGGERS] = EspuinoRfidTriggers()
+    return triggers
+
+
+class EspuinoRfidTriggers:
+    """Subscribers keyed by (device name, card ID).
+
+    A card ID of None subscribes to every card of the device. A scan only
+    touches the two matching lists, no matter how many automations exist.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the registry."""
+        self._subscribers: dict[tuple[str, str | None], list[Callable[[dict], None]]] = {}
+
+    @callback
+    def async_attach(self, device_name: str, card_id: str | None, action: Callable[[dict], None]) -> Callable[[], None]:
+        """Register a subscriber and return a function that removes it again."""
+        key = (device_name, card_id)
+        self._subscribers.setdefault(key, []).append(action)
+
+        @callback
+        def async_remove() -> None:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                return
+            subscribers.remove(action)
+            if not subscribers:
+                del self._subscribers[key]
+
+        return async_remove
+
+    @callback
+    def async_dispatch(self, device_name: str, card_id: str, event_data: dict) -> None:
+        """Call the subscribers for this card and the device-wide ones."""
+        for key in ((device_name, card_id), (device_name, None)):
+            for action in tuple(self._subscribers.get(key, ())):
+                action(event_data)
@@ -1,3 +1,4 @@
+from datetime import timedelta
 import logging
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -6,12 +7,15 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 from homeassistant.const import (
     EntityCategory,
     PERCENTAGE,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     UnitOfElectricPotential,
+    UnitOfTime,
 )
 
 from .const import (
@@ -31,11 +35,19 @@ from .const import (
     # STATE_SUFFIX_LOCK_CONTROLS, # Eher ein Binary Sensor oder Switch-State
     # TOPIC_REPEAT_MODE_STATE, # Eher ein Select-State oder Sensor
     # TOPIC_LED_BRIGHTNESS_STATE, # Eher ein Number-State oder Sensor
+    SIGNAL_STATS_UPDATED,
+    PROFILE_LEAN,
+    LEAN_PROFILE_OMITTED,
 )
+from .catalog import async_get_catalog
 from .entity import EspuinoMqttEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+# Die Firmware meldet die Restzeit nur in ganzen Minuten; kleinere Abweichungen
+# von der berechneten Ablaufzeit lösen keinen neuen State-Write aus.
+SLEEP_TIMER_TOLERANCE = timedelta(seconds=90)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -54,9 +66,16 @@ async def async_setup_entry(
         EspuinoRfidStateSensor(entry),
         EspuinoCurrentIpSensor(entry),
         EspuinoLedBrightnessStateSensor(entry), # Neuer Sensor hinzugefügt
+        EspuinoListeningTimeSensor(entry),
+        EspuinoTracksStartedSensor(entry),
+        EspuinoTopCardSensor(entry),
         # Hier könnten weitere Sensoren hinzugefügt werden, z.B. für LED Helligkeit, Repeat Mode etc.
         # wenn sie als reine Sensoren und nicht als steuerbare Entitäten (Number, Select) dargestellt werden sollen.
     ]
+    if hass.data[DOMAIN][entry.entry_id].entity_profile == PROFILE_LEAN:
+        # Diese Werte zeigen Media Player und LED-Helligkeit bereits selbst an
+        omitted = {key for platform, key in LEAN_PROFILE_OMITTED if platform == "sensor"}
+        entities = [entity for entity in entities if entity.entity_description_key not in omitted]
     async_add_entities(entities)
 
 
@@ -74,6 +93,7 @@ class EspuinoTrackSensor(EspuinoMqttEntity, SensorEntity):
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events when entity is added to hass."""
+        await super().async_added_to_hass() # Verfügbarkeit (Online-Topic, Watchdog)
         await self.async_subscribe_to_topic(self._topic_suffix)
 
     @callback
@@ -84,6 +104,16 @@ class EspuinoTrackSensor(EspuinoMqttEntity, SensorEntity):
             self.entity_id, msg.topic, msg.payload
         )
         self._attr_native_value = msg.payload
+        # Titel/Album/Interpret aus dem Track-Index des Geräts (Dict-Lookup statt Parsen)
+        if msg.payload and msg.payload.strip():
+            info = self._hub.library.async_lookup(msg.payload)
+            self._attr_extra_state_attributes.update(
+                title=info.title,
+                album=info.album,
+                artist=info.artist,
+                track=info.track,
+                playlist_size=info.playlist_size,
+            )
         self.async_write_ha_state()
 
     @callback
@@ -121,6 +151,7 @@ class EspuinoSimpleSensor(EspuinoMqttEntity, SensorEntity):
 
     async def async_added_to_hass(self):
         """Subscribe to MQTT events when entity is added to hass."""
+        await super().async_added_to_hass() # Verfügbarkeit (Online-Topic, Watchdog)
         await self.async_subscribe_to_topic(self._topic_suffix)
 
     @callback
@@ -223,12 +254,53 @@ class EspuinoPlaymodeSensor(EspuinoSimpleSensor):
                          "mdi:play-box-multiple-outline")
 
 class EspuinoSleepTimerStateSensor(EspuinoSimpleSensor):
+    """Expiry time of the sleep timer.
+
+    The firmware counts the remaining minutes down; instead of recording
+    every tick, the sensor holds the projected expiry timestamp and only
+    updates it when a report drifts by more than SLEEP_TIMER_TOLERANCE.
+    Modes without a fixed time (EOP, EOT, EO5T, ...) clear the expiry and
+    are exposed in the "mode" attribute.
+    """
+
     def __init__(self, entry: ConfigEntry):
         super().__init__(entry, 
                          "sleep_timer_state", 
                          "Sleep Timer", 
                          STATE_SUFFIX_SLEEP_TIMER, 
-                         "mdi:timer-sand")
+                         "mdi:timer-sand",
+                         device_class=SensorDeviceClass.TIMESTAMP)
+
+    @callback
+    def mqtt_message_received(self, msg):
+        """Handle remaining-minutes messages."""
+        _LOGGER.debug(
+            "EspuinoSleepTimerStateSensor (%s) received MQTT message on topic %s: %s",
+            self.entity_id, msg.topic, msg.payload
+        )
+        try:
+            remaining_minutes = float(msg.payload)
+        except ValueError:
+            # Kein Countdown, sondern z.B. "Ende der Playlist": kein Ablaufzeitpunkt bekannt
+            mode = str(msg.payload)
+            if self._attr_native_value is not None or self._attr_extra_state_attributes.get("mode") != mode:
+                self._attr_native_value = None
+                self._attr_extra_state_attributes["mode"] = mode
+                self.async_write_ha_state()
+            return
+
+        mode_changed = self._attr_extra_state_attributes.pop("mode", None) is not None
+        if remaining_minutes <= 0:
+            expiry = None # Timer aus
+        else:
+            expiry = dt_util.utcnow() + timedelta(minutes=remaining_minutes)
+            current = self._attr_native_value
+            if current is not None and abs(expiry - current) <= SLEEP_TIMER_TOLERANCE:
+                return # Countdown läuft wie berechnet, kein neuer State
+
+        if expiry != self._attr_native_value or mode_changed:
+            self._attr_native_value = expiry
+            self.async_write_ha_state()
 
 class EspuinoRfidStateSensor(EspuinoSimpleSensor):
     def __init__(self, entry: ConfigEntry):
@@ -257,3 +329,80 @@ class EspuinoLedBrightnessStateSensor(EspuinoSimpleSensor):
                          state_class=SensorStateClass.MEASUREMENT, # Helligkeit ist eine Messung
                          # Kein Unit of Measurement, da es ein Wert von 0-255 ist
                          entity_category=EntityCategory.DIAGNOSTIC) # Oder None, wenn es nicht als Diagnose gilt
+
+
+# Nutzungsstatistik: Werte kommen aus den Zählern des Hubs, nicht aus dem Recorder
+class EspuinoUsageSensor(EspuinoMqttEntity, SensorEntity):
+    """Base for sensors that show the hub's usage statistics."""
+
+    # Listen ändern sich mit jedem Update und würden die Datenbank füllen
+    _unrecorded_attributes = frozenset({"last_7_days", "minutes_per_hour", "top_cards"})
+
+    def __init__(self, entry: ConfigEntry, entity_key: str, name: str, icon: str):
+        super().__init__(entry, entity_key)
+        self._attr_name = name
+        self._attr_icon = icon
+        self._attr_native_value = None
+
+    @property
+    def available(self) -> bool:
+        """Statistics stay readable while the device is offline."""
+        return True
+
+    async def async_added_to_hass(self):
+        """Follow the statistics updates of the hub."""
+        await super().async_added_to_hass()
+        self._update_from_stats(self._hub.stats)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_STATS_UPDATED.format(self._device_name), self._async_stats_updated
+            )
+        )
+
+    @callback
+    def _async_stats_updated(self):
+        self._update_from_stats(self._hub.stats)
+        self.async_write_ha_state()
+
+    def _update_from_stats(self, stats):
+        """Copy the values of this sensor from the statistics. To be overridden by subclasses."""
+
+class EspuinoListeningTimeSensor(EspuinoUsageSensor):
+    def __init__(self, entry: ConfigEntry):
+        super().__init__(entry, "listening_time_today", "Listening Time Today", "mdi:headphones")
+        self._attr_device_class = SensorDeviceClass.DURATION
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING # Fällt um Mitternacht auf 0
+        self._attr_native_unit_of_measurement = UnitOfTime.MINUTES
+
+    def _update_from_stats(self, stats):
+        self._attr_native_value = round(stats.play_seconds() / 60, 1)
+        self._attr_extra_state_attributes.update(
+            last_7_days=stats.play_minutes_per_day(7),
+            minutes_per_hour=stats.play_minutes_per_hour(),
+        )
+
+class EspuinoTracksStartedSensor(EspuinoUsageSensor):
+    def __init__(self, entry: ConfigEntry):
+        super().__init__(entry, "tracks_started_today", "Tracks Started Today", "mdi:playlist-play")
+        self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def _update_from_stats(self, stats):
+        self._attr_native_value = stats.tracks_started()
+
+class EspuinoTopCardSensor(EspuinoUsageSensor):
+    def __init__(self, entry: ConfigEntry):
+        super().__init__(entry, "top_card", "Top Card", "mdi:card-account-details-star-outline")
+        self._catalog = None
+
+    async def async_added_to_hass(self):
+        self._catalog = await async_get_catalog(self.hass)
+        await super().async_added_to_hass()
+
+    def _update_from_stats(self, stats):
+        top_cards = []
+        for card_id, scans in stats.top_cards(5):
+            card = self._catalog.get(card_id)
+            top_cards.append({"card_id": card_id, "label": card.get("label") if card else None, "scans": scans})
+        # Zustand ist der Name der meistgenutzten Karte, ersatzweise ihre ID
+        self._attr_native_value = (top_cards[0]["label"] or top_cards[0]["card_id"]) if top_cards else None
+        self._attr_extra_state_attributes.update(top_cards=top_cards)
@@ -0,0 +1,91 @@
+"""Services for the ESPuino integration."""
+import logging
+
+import voluptuous as vol
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+import homeassistant.helpers.config_validation as cv
+
+from .catalog import async_get_catalog
+from .profiler import async_get_profiler
+from .const import (
+    DOMAIN,
+    SERVICE_SET_CARD,
+    SERVICE_REMOVE_CARD,
+    ATTR_CARD_ID,
+    ATTR_LABEL,
+    ATTR_FOLDER,
+    ATTR_PLAY_MODE,
+    ATTR_DEVICES,
+    CONF_DEVICES,
+    SERVICE_IMPORT_DEVICES,
+    SERVICE_PROFILE,
+    ATTR_SECONDS,
+    DEFAULT_PROFILE_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SET_CARD_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CARD_ID): cv.string,
+        vol.Optional(ATTR_LABEL): vol.Any(None, cv.string),
+        vol.Optional(ATTR_FOLDER): vol.Any(None, cv.string),
+        vol.Optional(ATTR_PLAY_MODE): vol.Any(None, cv.string),
+        # Leere Liste = Karte gilt für alle Geräte
+        vol.Optional(ATTR_DEVICES): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+
+REMOVE_CARD_SCHEMA = vol.Schema({vol.Required(ATTR_CARD_ID): cv.string})
+
+IMPORT_DEVICES_SCHEMA = vol.Schema(
+    {vol.Required(CONF_DEVICES): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1))}
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SECONDS, default=DEFAULT_PROFILE_SECONDS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=600)
+        )
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration-wide ESPuino services."""
+
+    async def async_set_card(call: ServiceCall) -> None:
+        catalog = await async_get_catalog(hass)
+        changes = {key: value for key, value in call.data.items() if key != ATTR_CARD_ID}
+        catalog.async_set_card(call.data[ATTR_CARD_ID], **changes)
+
+    async def async_remove_card(call: ServiceCall) -> None:
+        catalog = await async_get_catalog(hass)
+        if not catalog.async_remove_card(call.data[ATTR_CARD_ID]):
+            _LOGGER.warning("RFID card %s is not in the catalog", call.data[ATTR_CARD_ID])
+
+    async def async_import_devices(call: ServiceCall) -> None:
+        """Add several ESPuinos at once by their MQTT device names."""
+        await hass.config_entries.flow.async_init(
+            DOMAIN,
+            context={"source": SOURCE_IMPORT},
+            data={CONF_DEVICES: call.data[CONF_DEVICES]},
+        )
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile message handling and publishing for some seconds."""
+        profiler = async_get_profiler(hass)
+        if profiler.active:
+            _LOGGER.warning("The ESPuino profiler is already running")
+            return
+        profiler.async_start(call.data[ATTR_SECONDS])
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_CARD, async_set_card, schema=SET_CARD_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_REMOVE_CARD, async_remove_card, schema=REMOVE_CARD_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_IMPORT_DEVICES, async_import_devices, schema=IMPORT_DEVICES_SCHEMA
+    )
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA)
@@ -0,0 +1,202 @@
+"""Incrementally kept listening statistics of one ESPuino."""
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later, async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import STORAGE_KEY_STATS, STORAGE_VERSION, SIGNAL_STATS_UPDATED
+
+_LOGGER = logging.getLogger(__name__)
+
+DAYS = 31 # Länge des Tages-Rings
+TOP_CARDS_CAPACITY = 50 # Feste Anzahl gezählter Karten (Space-Saving-Zählung)
+TICK = 60 # Sekunden, nach denen laufende Wiedergabe verbucht wird
+SAVE_DELAY = 30 # Sekunden, kürzer als TICK, sonst verschiebt jeder Tick das Speichern
+PLAYING_PAYLOADS = {"playing", "play"}
+
+
+class EspuinoUsageStats:
+    """Listening time, started tracks, top cards and an hour-of-day histogram.
+
+    Everything lives in fixed-size arrays that are updated as messages
+    arrive: a ring of ``DAYS`` day slots (tagged with the date ordinal, so
+    stale slots are reset on reuse), 24 hour buckets and a bounded card
+    counter. Reading a value never touches the recorder.
+    """
+
+    def __init__(self, hass: HomeAssistant, device_name: str) -> None:
+        """Initialize the statistics."""
+        self.hass = hass
+        self.device_name = device_name
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_STATS}.{device_name}")
+        self._day_ordinals = [0] * DAYS
+        self._daily_seconds = [0.0] * DAYS
+        self._daily_tracks = [0] * DAYS
+        self._hourly_seconds = [0.0] * 24
+        self._cards: dict[str, int] = {}
+        self._playing_since: datetime | None = None
+        self._last_track: str | None = None
+        self._unsub_tick: Callable[[], None] | None = None
+        self._unsub_midnight: Callable[[], None] | None = None
+
+    async def async_load(self) -> None:
+        """Load the statistics from storage."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        if len(data.get("day_ordinals", ())) == DAYS:
+            self._day_ordinals = data["day_ordinals"]
+            self._daily_seconds = data["daily_seconds"]
+            self._daily_tracks = data["daily_tracks"]
+        if len(data.get("hourly_seconds", ())) == 24:
+            self._hourly_seconds = data["hourly_seconds"]
+        self._cards = data.get("cards", {})
+
+    @callback
+    def _data_to_save(self) -> dict:
+        return {
+            "day_ordinals": self._day_ordinals,
+            "daily_seconds": [round(seconds, 1) for seconds in self._daily_seconds],
+            "daily_tracks": self._daily_tracks,
+            "hourly_seconds": [round(seconds, 1) for seconds in self._hourly_seconds],
+            "cards": self._cards,
+        }
+
+    @callback
+    def async_start(self) -> None:
+        """Start the midnight rollover of the day values."""
+        self._unsub_midnight = async_track_time_change(
+            self.hass, self._async_midnight, hour=0, minute=0, second=0
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Book the running playback and stop all timers."""
+        self.async_set_playing(False)
+        if self._unsub_midnight is not None:
+            self._unsub_midnight()
+            self._unsub_midnight = None
+
+    # --- Eingänge (Hub-Listener) ---
+
+    @callback
+    def async_playback_received(self, msg) -> None:
+        """Start or stop counting play time."""
+        self.async_set_playing(msg.payload.strip().lower() in PLAYING_PAYLOADS)
+
+    @callback
+    def async_track_received(self, msg) -> None:
+        """Count a started track."""
+        payload = msg.payload.strip()
+        if msg.retain or not payload or payload == self._last_track:
+            return # Gespeicherter Wert beim Abonnieren oder Wiederholung
+        self._last_track = payload
+        self._daily_tracks[self._day_slot(dt_util.now().date())] += 1
+        self._async_changed()
+
+    @callback
+    def async_rfid_received(self, msg) -> None:
+        """Count a card scan."""
+        card_id = msg.payload.strip()
+        if msg.retain or not card_id or card_id == "0":
+            return
+        cards = self._cards
+        if card_id in cards or len(cards) < TOP_CARDS_CAPACITY:
+            cards[card_id] = cards.get(card_id, 0) + 1
+        else:
+            # Space-Saving: die seltenste Karte wird ersetzt und erbt deren Zählerstand
+            rarest = min(cards, key=cards.get)
+            cards[card_id] = cards.pop(rarest) + 1
+        self._async_changed()
+
+    @callback
+    def async_set_playing(self, playing: bool) -> None:
+        """Book the play time so far and switch the play state."""
+        now = dt_util.utcnow()
+        if self._playing_since is not None:
+            self._add_play_time(self._playing_since, now)
+        if self._unsub_tick is not None:
+            self._unsub_tick()
+            self._unsub_tick = None
+        if playing:
+            self._playing_since = now
+            self._unsub_tick = async_call_later(self.hass, TICK, self._async_tick)
+        elif self._playing_since is not None:
+            self._playing_since = None
+            self._async_changed()
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        self._unsub_tick = None
+        self.async_set_playing(True)
+        self._async_changed()
+
+    @callback
+    def _async_midnight(self, _now) -> None:
+        if self._playing_since is not None:
+            self.async_set_playing(True) # Restzeit dem alten Tag zuschlagen
+        self._async_changed()
+
+    def _add_play_time(self, start: datetime, end: datetime) -> None:
+        """Distribute a play interval over its days and hours."""
+        while start < end:
+            local = dt_util.as_local(start)
+            next_hour = dt_util.as_utc(local.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+            if next_hour <= start:
+                next_hour = start + timedelta(hours=1)
+            chunk_end = min(end, next_hour)
+            seconds = (chunk_end - start).total_seconds()
+            self._daily_seconds[self._day_slot(local.date())] += seconds
+            self._hourly_seconds[local.hour] += seconds
+            start = chunk_end
+
+    def _day_slot(self, day: date) -> int:
+        """Return the ring slot of a day, clearing it if it still holds an older day."""
+        ordinal = day.toordinal()
+        slot = ordinal % DAYS
+        if self._day_ordinals[slot] != ordinal:
+            self._day_ordinals[slot] = ordinal
+            self._daily_seconds[slot] = 0.0
+            self._daily_tracks[slot] = 0
+        return slot
+
+    @callback
+    def _async_changed(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        async_dispatcher_send(self.hass, SIGNAL_STATS_UPDATED.format(self.device_name))
+
+    # --- Auslesen ---
+
+    def _day_value(self, values: list, day: date):
+        ordinal = day.toordinal()
+        slot = ordinal % DAYS
+        return values[slot] if self._day_ordinals[slot] == ordinal else 0
+
+    def play_seconds(self, day: date | None = None) -> float:
+        """Return the booked play seconds of a day (default: today)."""
+        return self._day_value(self._daily_seconds, day or dt_util.now().date())
+
+    def tracks_started(self, day: date | None = None) -> int:
+        """Return the number of tracks started on a day (default: today)."""
+        return self._day_value(self._daily_tracks, day or dt_util.now().date())
+
+    def play_minutes_per_day(self, days: int = 7) -> list[int]:
+        """Return the play minutes of the last days, oldest first."""
+        today = dt_util.now().date()
+        return [
+            round(self.play_seconds(today - timedelta(days=offset)) / 60)
+            for offset in range(min(days, DAYS) - 1, -1, -1)
+        ]
+
+    def play_minutes_per_hour(self) -> list[int]:
+        """Return the all-time play minutes per hour of the day."""
+        return [round(seconds / 60) for seconds in self._hourly_seconds]
+
+    def top_cards(self, count: int = 5) -> list[tuple[str, int]]:
+        """Return the most scanned cards with their scan counts."""
+        return sorted(self._cards.items(), key=lambda item: item[1], reverse=True)[:count]
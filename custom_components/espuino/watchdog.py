@@ -0,0 +1,102 @@
+"""Integration-wide detection of ESPuinos that went silent without an LWT."""
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+
+from .const import DATA_WATCHDOG
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_watchdog(hass: HomeAssistant) -> "EspuinoStalenessWatchdog":
+    """Return the shared staleness watchdog."""
+    watchdog = hass.data.get(DATA_WATCHDOG)
+    if watchdog is None:
+        watchdog = hass.data[DATA_WATCHDOG] = EspuinoStalenessWatchdog(hass)
+    return watchdog
+
+
+class EspuinoStalenessWatchdog:
+    """One timer and one deadline heap for all devices.
+
+    Hubs only store the loop time of their last message, so a message
+    costs no heap operation. When the earliest deadline is due, the entry
+    is checked against the real last-seen time and either re-queued or the
+    device is marked stale. A stale device is queued again on its next
+    message.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the watchdog."""
+        self.hass = hass
+        self._heap: list[tuple[float, int, object]] = [] # (deadline, seq, hub)
+        self._seq = itertools.count()
+        # hub -> [timeout in Sekunden, seq des gültigen Heap-Eintrags]; ältere Einträge werden übersprungen
+        self._hubs: dict[object, list] = {}
+        self._timer = None
+        self._timer_deadline = None
+
+    @callback
+    def async_register(self, hub, timeout: float) -> None:
+        """Start watching a hub. A timeout of 0 disables the watchdog for it."""
+        if timeout <= 0:
+            self.async_unregister(hub)
+            return
+        self._hubs[hub] = [timeout, None]
+        self._async_push(hub, hub.last_seen + timeout)
+
+    @callback
+    def async_unregister(self, hub) -> None:
+        """Stop watching a hub; its heap entries are dropped lazily."""
+        self._hubs.pop(hub, None)
+
+    @callback
+    def async_requeue(self, hub) -> None:
+        """Queue a hub again after it recovered from being stale."""
+        if (watched := self._hubs.get(hub)) is not None:
+            self._async_push(hub, hub.last_seen + watched[0])
+
+    @callback
+    def _async_push(self, hub, deadline: float) -> None:
+        seq = next(self._seq)
+        self._hubs[hub][1] = seq
+        heapq.heappush(self._heap, (deadline, seq, hub))
+        if self._timer_deadline is None or deadline < self._timer_deadline:
+            self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._timer is not None:
+            self._timer()
+            self._timer = self._timer_deadline = None
+        if self._heap:
+            self._timer_deadline = self._heap[0][0]
+            self._timer = async_call_at(self.hass, self._async_check, self._timer_deadline)
+
+    @callback
+    def _async_check(self, _now=None) -> None:
+        """Handle all due deadlines."""
+        self._timer = self._timer_deadline = None
+        now = self.hass.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, seq, hub = heapq.heappop(self._heap)
+            watched = self._hubs.get(hub)
+            if watched is None or watched[1] != seq:
+                continue # Abgemeldet oder durch einen neueren Eintrag ersetzt
+            timeout = watched[0]
+            deadline = hub.last_seen + timeout
+            if deadline > now:
+                seq = next(self._seq)
+                watched[1] = seq
+                heapq.heappush(self._heap, (deadline, seq, hub))
+            else:
+                watched[1] = None
+                _LOGGER.info(
+                    "No message from %s for %s s, marking it unavailable", hub.device_name, int(timeout)
+                )
+                hub.async_set_stale(True)
+        self._async_schedule()
@@ -0,0 +1,485 @@
+"""Simulate a fleet of ESPuino devices for soak and load tests.
+
+The simulator speaks the same MQTT topics as the ESPuino firmware
+(``<device>/State/*`` and ``<device>/Cmnd/*``) and runs either against a
+real broker (needs ``paho-mqtt``) or against an in-memory broker that can
+be used from test code without any network.
+
+Command line::
+
+    python tools/espuino_simulator.py --devices 500 --broker localhost:1883 --duration 600
+
+Importable::
+
+    broker = InMemoryBroker()
+    broker.subscribe("+/State/#", lambda topic, payload, retain: ...)
+    stats = asyncio.run(run_fleet(broker, SimulatorConfig(devices=10), duration=60))
+
+The simulator does not import Home Assistant.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import json
+import logging
+import random
+import time
+from typing import Callable
+
+_LOGGER = logging.getLogger("espuino_simulator")
+
+STATE = "State"
+CMND = "Cmnd"
+PAYLOAD_ONLINE = "Online"
+PAYLOAD_OFFLINE = "Offline"
+
+# TrackControl-Befehle der Firmware
+TRACK_STOP = "1"
+TRACK_PLAY_PAUSE = "3"
+TRACK_NEXT = "4"
+TRACK_PREVIOUS = "5"
+
+FOLDERS = [
+    "/Hoerspiele/Benjamin Bluemchen/Folge 1",
+    "/Hoerspiele/Die drei Fragezeichen/Folge 42",
+    "/Musik/Rolf Zuckowski/Weihnachtsbaeckerei",
+    "/Musik/Deine Freunde/Ausm Haus",
+    "/Einschlafmusik/Spieluhr",
+]
+
+MessageCallback = Callable[[str, str, bool], None]
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """Return True if topic matches an MQTT subscription pattern with + and #."""
+    pattern_parts = pattern.split("/")
+    topic_parts = topic.split("/")
+    for index, part in enumerate(pattern_parts):
+        if part == "#":
+            return True
+        if index >= len(topic_parts):
+            return False
+        if part != "+" and part != topic_parts[index]:
+            return False
+    return len(pattern_parts) == len(topic_parts)
+
+
+@dataclass
+class SimulatorConfig:
+    """Rates and sizes of a simulated fleet. Intervals are in seconds."""
+
+    devices: int = 10
+    prefix: str = "ESPuino_sim_"
+    track_interval: float = 180.0 # Mittlere Zeit bis zum nächsten Titel
+    rssi_interval: float = 30.0
+    battery_interval: float = 60.0
+    card_interval: float = 900.0 # Mittlere Zeit bis eine neue Karte aufgelegt wird
+    flap_interval: float = 3600.0 # Mittlere Zeit bis zu einem Verbindungsabbruch (0 = nie)
+    offline_duration: float = 20.0
+    snapshot: bool = False # Zusätzlich <device>/State/All als JSON senden
+    tick: float = 1.0
+    seed: int | None = None
+
+
+class InMemoryBroker:
+    """Minimal MQTT stand-in: wildcard subscriptions, retained messages and last wills."""
+
+    def __init__(self) -> None:
+        """Initialize the broker."""
+        self._subscriptions: list[tuple[str, MessageCallback]] = []
+        self.retained: dict[str, str] = {}
+        self.stats: Counter = Counter()
+
+    def subscribe(self, pattern: str, msg_callback: MessageCallback) -> Callable[[], None]:
+        """Subscribe to a pattern; retained messages are delivered immediately."""
+        entry = (pattern, msg_callback)
+        self._subscriptions.append(entry)
+        for topic, payload in list(self.retained.items()):
+            if topic_matches(pattern, topic):
+                msg_callback(topic, payload, True)
+        return lambda: self._subscriptions.remove(entry)
+
+    def publish(self, topic: str, payload: str, retain: bool = False) -> None:
+        """Deliver a message to all matching subscribers."""
+        self.stats["published"] += 1
+        if retain:
+            self.retained[topic] = payload
+        for pattern, msg_callback in list(self._subscriptions):
+            if topic_matches(pattern, topic):
+                self.stats["delivered"] += 1
+                msg_callback(topic, payload, False)
+
+    def connect(self, client_id: str, will_topic: str | None = None, will_payload: str | None = None) -> "InMemoryConnection":
+        """Open a client connection with an optional last will."""
+        return InMemoryConnection(self, client_id, will_topic, will_payload)
+
+
+class InMemoryConnection:
+    """Client connection to the InMemoryBroker."""
+
+    def __init__(self, broker: InMemoryBroker, client_id: str, will_topic: str | None, will_payload: str | None) -> None:
+        self._broker = broker
+        self.client_id = client_id
+        self._will = (will_topic, will_payload)
+        self._unsubscribes: list[Callable[[], None]] = []
+
+    def publish(self, topic: str, payload: str, retain: bool = False) -> None:
+        self._broker.publish(topic, payload, retain)
+
+    def subscribe(self, pattern: str, msg_callback: MessageCallback) -> None:
+        self._unsubscribes.append(self._broker.subscribe(pattern, msg_callback))
+
+    def disconnect(self, clean: bool = True) -> None:
+        """Close the connection; an unclean disconnect publishes the last will."""
+        for unsubscribe in self._unsubscribes:
+            unsubscribe()
+        self._unsubscribes.clear()
+        will_topic, will_payload = self._will
+        if not clean and will_topic is not None:
+            self._broker.publish(will_topic, will_payload, retain=True)
+
+
+class PahoBroker:
+    """Connections to a real MQTT broker, one client per simulated device."""
+
+    def __init__(self, host: str, port: int = 1883, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        """Initialize the broker adapter."""
+        try:
+            import paho.mqtt.client  # noqa: F401
+        except ImportError as err:
+            raise RuntimeError("paho-mqtt is required for a real broker, use --broker memory otherwise") from err
+        self.host = host
+        self.port = port
+        self.loop = loop or asyncio.get_event_loop()
+
+    def connect(self, client_id: str, will_topic: str | None = None, will_payload: str | None = None) -> "PahoConnection":
+        return PahoConnection(self, client_id, will_topic, will_payload)
+
+
+class PahoConnection:
+    """paho-mqtt client with callbacks marshalled onto the asyncio loop."""
+
+    def __init__(self, broker: PahoBroker, client_id: str, will_topic: str | None, will_payload: str | None) -> None:
+        import paho.mqtt.client as mqtt
+
+        self._loop = broker.loop
+        self._callbacks: list[tuple[str, MessageCallback]] = []
+        try:
+            self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=client_id)
+        except AttributeError: # paho-mqtt < 2.0
+            self._client = mqtt.Client(client_id=client_id)
+        if will_topic is not None:
+            self._client.will_set(will_topic, will_payload, retain=True)
+        self._client.on_message = self._on_message
+        self._client.connect(broker.host, broker.port)
+        self._client.loop_start()
+
+    def _on_message(self, _client, _userdata, message) -> None:
+        payload = message.payload.decode("utf-8", "replace")
+        for pattern, msg_callback in list(self._callbacks):
+            if topic_matches(pattern, message.topic):
+                self._loop.call_soon_threadsafe(msg_callback, message.topic, payload, message.retain)
+
+    def publish(self, topic: str, payload: str, retain: bool = False) -> None:
+        self._client.publish(topic, payload, retain=retain)
+
+    def subscribe(self, pattern: str, msg_callback: MessageCallback) -> None:
+        self._callbacks.append((pattern, msg_callback))
+        self._client.subscribe(pattern)
+
+    def disconnect(self, clean: bool = True) -> None:
+        if clean:
+            self._client.disconnect()
+        else:
+            # Socket hart schließen, damit der Broker das Last Will sendet
+            self._client.socket().close()
+        self._client.loop_stop()
+
+
+class SimulatedEspuino:
+    """One simulated box: publishes State/* traffic and answers Cmnd/* topics."""
+
+    def __init__(self, name: str, broker, config: SimulatorConfig, rng: random.Random) -> None:
+        """Initialize the device with random but plausible values."""
+        self.name = name
+        self._broker = broker
+        self._config = config
+        self._rng = rng
+        self._connection = None
+        self.online = False
+        self.stats: Counter = Counter()
+
+        self.ip = f"10.0.{rng.randint(1, 254)}.{rng.randint(1, 254)}"
+        self.loudness = rng.randint(5, 15)
+        self.rssi = rng.randint(-80, -45)
+        self.battery = rng.uniform(60, 100)
+        self.lock_controls = "OFF"
+        self.led_brightness = 16
+        self.repeat_mode = "0"
+        self.sleep_timer = 0
+        self.rfid = None
+        self.playmode = "0"
+        self.folder = None
+        self.track = 0
+        self.playlist_size = 0
+        self.playback = "stop"
+
+    # --- MQTT ---
+
+    def _publish(self, suffix: str, payload, retain: bool = False) -> None:
+        self.stats[suffix] += 1
+        self._connection.publish(f"{self.name}/{STATE}/{suffix}", str(payload), retain)
+
+    def connect(self) -> None:
+        """Connect, announce Online (retained) and publish the full state."""
+        self._connection = self._broker.connect(
+            self.name, will_topic=f"{self.name}/{STATE}/State", will_payload=PAYLOAD_OFFLINE
+        )
+        self._connection.subscribe(f"{self.name}/{CMND}/#", self._command_received)
+        self.online = True
+        self._publish("State", PAYLOAD_ONLINE, retain=True)
+        self.publish_all()
+
+    def drop_connection(self) -> None:
+        """Lose the connection without saying goodbye; the broker sends the LWT."""
+        self.online = False
+        self.stats["flaps"] += 1
+        self._connection.disconnect(clean=False)
+
+    def shutdown(self) -> None:
+        """Go to sleep like the firmware does: publish Sleep and Offline, then disconnect."""
+        if not self.online:
+            return
+        self._publish("Sleep", "ON")
+        self._publish("State", PAYLOAD_OFFLINE, retain=True)
+        self.online = False
+        self._connection.disconnect(clean=True)
+
+    def publish_all(self) -> None:
+        """Publish every value, as the firmware does after (re)connecting."""
+        self._publish("Loudness", self.loudness)
+        self._publish("WifiRssi", self.rssi)
+        self._publish("Battery", round(self.battery))
+        self._publish("Voltage", self.voltage)
+        self._publish("SoftwareRevision", "ESPuino simulator")
+        self._publish("IPv4", self.ip)
+        self._publish("LockControls", self.lock_controls)
+        self._publish("LedBrightness", self.led_brightness)
+        self._publish("RepeatMode", self.repeat_mode)
+        self._publish("SleepTimer", self.sleep_timer)
+        self._publish("Playmode", self.playmode)
+        self._publish("PlaybackState", self.playback)
+        self._publish("Track", self.track_payload)
+        if self._config.snapshot:
+            self.publish_snapshot()
+
+    def publish_snapshot(self) -> None:
+        """Publish the combined JSON snapshot topic."""
+        self._publish("All", json.dumps({
+            "Loudness": self.loudness,
+            "WifiRssi": self.rssi,
+            "Battery": round(self.battery),
+            "Voltage": self.voltage,
+            "LockControls": self.lock_controls,
+            "LedBrightness": self.led_brightness,
+            "RepeatMode": self.repeat_mode,
+            "SleepTimer": self.sleep_timer,
+            "Playmode": self.playmode,
+            "PlaybackState": self.playback,
+            "Track": self.track_payload,
+        }))
+
+    @property
+    def voltage(self) -> float:
+        return round(3.2 + self.battery / 100, 2)
+
+    @property
+    def track_payload(self) -> str:
+        if self.folder is None:
+            return ""
+        return f"({self.track}/{self.playlist_size}): {self.folder}/{self.track:02d} Kapitel {self.track}.mp3"
+
+    def _command_received(self, topic: str, payload: str, _retain: bool) -> None:
+        """Answer a command with the same echoes as the firmware."""
+        if not self.online:
+            return
+        command = topic.rsplit("/", 1)[-1]
+        self.stats[f"cmnd_{command}"] += 1
+        value = None
+        if command in ("Loudness", "LedBrightness", "SleepTimer"):
+            try:
+                value = int(float(payload))
+            except ValueError:
+                return # Die Firmware ignoriert ungültige Zahlen ebenfalls
+        if command == "Loudness":
+            self.loudness = max(0, min(21, value))
+            self._publish("Loudness", self.loudness)
+        elif command == "LockControls":
+            self.lock_controls = payload.upper()
+            self._publish("LockControls", self.lock_controls)
+        elif command == "LedBrightness":
+            self.led_brightness = value
+            self._publish("LedBrightness", self.led_brightness)
+        elif command == "RepeatMode":
+            self.repeat_mode = payload
+            self._publish("RepeatMode", self.repeat_mode)
+        elif command == "SleepTimer":
+            self.sleep_timer = value
+            self._publish("SleepTimer", self.sleep_timer)
+        elif command == "Rfid":
+            self.insert_card(payload)
+        elif command == "TrackControl":
+            self.track_control(payload)
+        elif command == "Sleep":
+            self.shutdown()
+
+    # --- Verhalten ---
+
+    def insert_card(self, card_id: str | None = None) -> None:
+        """Apply an RFID card and start its folder."""
+        self.rfid = card_id or f"{self._rng.randrange(10**11, 10**12)}"
+        self.folder = self._rng.choice(FOLDERS)
+        self.playlist_size = self._rng.randint(3, 30)
+        self.track = 1
+        self.playmode = str(self._rng.choice([3, 4, 5]))
+        self.playback = "play"
+        self._publish("Rfid", self.rfid)
+        self._publish("Playmode", self.playmode)
+        self._publish("Track", self.track_payload)
+        self._publish("PlaybackState", self.playback)
+
+    def track_control(self, payload: str) -> None:
+        if payload == TRACK_STOP:
+            self.playback = "stop"
+        elif payload == TRACK_PLAY_PAUSE:
+            self.playback = "pause" if self.playback == "play" else "play"
+        elif payload in (TRACK_NEXT, TRACK_PREVIOUS) and self.folder is not None:
+            step = 1 if payload == TRACK_NEXT else -1
+            self.track = max(1, min(self.playlist_size, self.track + step))
+            self.playback = "play"
+            self._publish("Track", self.track_payload)
+        self._publish("PlaybackState", self.playback)
+
+    def _chance(self, interval: float) -> bool:
+        """Poisson process: True with the probability of an event within one tick."""
+        return interval > 0 and self._rng.random() < self._config.tick / interval
+
+    def tick(self) -> None:
+        """Advance the simulation by one tick."""
+        if not self.online:
+            return
+        if self._chance(self._config.card_interval):
+            self.insert_card()
+        if self.playback == "play" and self._chance(self._config.track_interval):
+            if self.track < self.playlist_size:
+                self.track += 1
+                self._publish("Track", self.track_payload)
+            else:
+                self.playback = "stop"
+                self._publish("PlaybackState", self.playback)
+        if self._chance(self._config.rssi_interval):
+            self.rssi = max(-95, min(-30, self.rssi + self._rng.randint(-3, 3)))
+            self._publish("WifiRssi", self.rssi)
+        if self._chance(self._config.battery_interval):
+            drain = 0.05 if self.playback != "play" else 0.3
+            self.battery = max(0.0, self.battery - drain)
+            self._publish("Battery", round(self.battery))
+            self._publish("Voltage", self.voltage)
+        if self.sleep_timer > 0 and self._chance(60):
+            self.sleep_timer -= 1
+            self._publish("SleepTimer", self.sleep_timer)
+            if self.sleep_timer == 0:
+                self.shutdown()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Run until stop is set, including random connection flaps."""
+        # Zufälliger Start, damit nicht alle Geräte im selben Takt senden
+        await asyncio.sleep(self._rng.uniform(0, self._config.tick))
+        self.connect()
+        while not stop.is_set():
+            if self.online and self._chance(self._config.flap_interval):
+                self.drop_connection()
+                try:
+                    await asyncio.wait_for(stop.wait(), self._config.offline_duration)
+                    break # Während der Offline-Phase beendet
+                except asyncio.TimeoutError:
+                    pass
+                self.connect()
+                continue
+            self.tick()
+            await asyncio.sleep(self._config.tick)
+        self.shutdown()
+
+
+async def run_fleet(broker, config: SimulatorConfig, duration: float | None = None, stop: asyncio.Event | None = None) -> Counter:
+    """Run config.devices simulated ESPuinos and return the summed publish counters."""
+    rng = random.Random(config.seed)
+    stop = stop or asyncio.Event()
+    devices = [
+        SimulatedEspuino(f"{config.prefix}{index:03d}", broker, config, random.Random(rng.random()))
+        for index in range(config.devices)
+    ]
+    tasks = [asyncio.ensure_future(device.run(stop)) for device in devices]
+    if duration is not None:
+        asyncio.get_running_loop().call_later(duration, stop.set)
+    await asyncio.gather(*tasks)
+    total: Counter = Counter()
+    for device in devices:
+        total.update(device.stats)
+    return total
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", 1)[0])
+    parser.add_argument("--devices", type=int, default=10, help="number of simulated ESPuinos")
+    parser.add_argument("--broker", default="memory", help="'memory' or host[:port] of an MQTT broker")
+    parser.add_argument("--duration", type=float, default=60.0, help="runtime in seconds")
+    parser.add_argument("--prefix", default=SimulatorConfig.prefix, help="device name prefix")
+    parser.add_argument("--track-interval", type=float, default=SimulatorConfig.track_interval)
+    parser.add_argument("--rssi-interval", type=float, default=SimulatorConfig.rssi_interval)
+    parser.add_argument("--battery-interval", type=float, default=SimulatorConfig.battery_interval)
+    parser.add_argument("--card-interval", type=float, default=SimulatorConfig.card_interval)
+    parser.add_argument("--flap-interval", type=float, default=SimulatorConfig.flap_interval, help="0 disables flaps")
+    parser.add_argument("--offline-duration", type=float, default=SimulatorConfig.offline_duration)
+    parser.add_argument("--snapshot", action="store_true", help="also publish <device>/State/All")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+
+    config = SimulatorConfig(
+        devices=args.devices,
+        prefix=args.prefix,
+        track_interval=args.track_interval,
+        rssi_interval=args.rssi_interval,
+        battery_interval=args.battery_interval,
+        card_interval=args.card_interval,
+        flap_interval=args.flap_interval,
+        offline_duration=args.offline_duration,
+        snapshot=args.snapshot,
+        seed=args.seed,
+    )
+
+    async def _run() -> Counter:
+        if args.broker == "memory":
+            broker = InMemoryBroker()
+        else:
+            host, _, port = args.broker.partition(":")
+            broker = PahoBroker(host, int(port or 1883), asyncio.get_running_loop())
+        return await run_fleet(broker, config, args.duration)
+
+    started = time.monotonic()
+    stats = asyncio.run(_run())
+    elapsed = time.monotonic() - started
+    published = sum(count for key, count in stats.items() if not key.startswith("cmnd_") and key != "flaps")
+    print(f"{config.devices} devices, {elapsed:.1f} s, {published} messages ({published / elapsed:.1f}/s)")
+    for key, count in sorted(stats.items()):
+        print(f"  {key:20} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""Measure import time and startup time of the ESPuino integration.
+
+Two measurements, both in fresh interpreters so nothing is cached:
+
+* import: every module of the integration is imported with
+  ``python -X importtime`` after the Home Assistant core modules, so the
+  reported cumulative time is what the module and the HA components it
+  pulls in add to a running Home Assistant.
+* startup: Home Assistant is booted from a copy of a config directory
+  with 1, 10 and 100 ESPuino config entries, once with all platforms
+  forwarded at startup and once with the "load secondary entities after
+  startup" option. Reported are the time until bootstrap has finished,
+  how many media players have a state at that point, the time until every
+  ESPuino entity has a state and the bootstrap time per entry.
+
+Needs Home Assistant installed and a config directory with a working MQTT
+integration. The devices do not have to exist; point the broker at
+``tools/espuino_simulator.py --prefix bench_ --devices 100`` to benchmark
+with traffic.
+
+Command line::
+
+    python tools/startup_benchmark.py --config ~/ha-bench-config --entries 1 10 100
+    python tools/startup_benchmark.py --import-only
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOMAIN = "espuino"
+# Wie PLATFORMS in custom_components/espuino/__init__.py
+PLATFORMS = ["sensor", "media_player", "button", "switch", "number", "binary_sensor"]
+# Bereits geladen, bevor Home Assistant eine Integration importiert
+HA_PRELOADED = [
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.config_validation",
+]
+CONF_DEFER_PLATFORMS = "defer_platforms"
+DEVICE_PREFIX = "bench_"
+ENTITY_TIMEOUT = 120 # Sekunden, bis alle Entitäten da sein müssen
+
+
+# --- Importzeit ---
+
+def _import_time(module: str) -> tuple[int, int]:
+    """Return (own, cumulative) import time of module in microseconds."""
+    code = "; ".join(f"import {name}" for name in [*HA_PRELOADED, module])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        parts = [part.strip() for part in line.removeprefix("import time:").split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[0]), int(parts[1])
+    return 0, 0 # Schon mit den HA-Modulen geladen
+
+
+def benchmark_imports(repeat: int) -> None:
+    """Print the median import times of the integration and its platforms."""
+    modules = [f"custom_components.{DOMAIN}"] + [f"custom_components.{DOMAIN}.{platform}" for platform in PLATFORMS]
+    print(f"Import time, median of {repeat} fresh interpreters (ms)")
+    print(f"  {'module':40} {'own':>8} {'cumulative':>11}")
+    for module in modules:
+        runs = [_import_time(module) for _ in range(repeat)]
+        own = statistics.median(run[0] for run in runs) / 1000
+        cumulative = statistics.median(run[1] for run in runs) / 1000
+        print(f"  {module:40} {own:8.1f} {cumulative:11.1f}")
+
+
+# --- Startzeit (läuft im Kindprozess) ---
+
+def _espuino_entity_ids(hass) -> list[str]:
+    from homeassistant.helpers import entity_registry as er
+
+    return [entry.entity_id for entry in er.async_get(hass).entities.values() if entry.platform == DOMAIN]
+
+
+async def _async_boot(config_dir: str):
+    from homeassistant import bootstrap, runner
+
+    hass = await bootstrap.async_setup_hass(runner.RuntimeConfig(config_dir=config_dir, skip_pip=True))
+    if hass is None:
+        raise RuntimeError(f"Home Assistant could not be set up from {config_dir}")
+    return hass
+
+
+async def _async_wait_for(predicate, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+async def _async_prepare(config_dir: str, entries: int) -> None:
+    """Create the ESPuino config entries and their registry entities."""
+    from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntryState
+
+    hass = await _async_boot(config_dir)
+    await hass.async_start()
+    await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": SOURCE_IMPORT},
+        data={"devices": [f"{DEVICE_PREFIX}{index:03}" for index in range(entries)]},
+    )
+
+    def loaded() -> bool:
+        config_entries = hass.config_entries.async_entries(DOMAIN)
+        return len(config_entries) >= entries and all(
+            entry.state is ConfigEntryState.LOADED for entry in config_entries
+        )
+
+    if not await _async_wait_for(loaded, ENTITY_TIMEOUT):
+        raise RuntimeError(f"Not all {entries} ESPuino entries were set up")
+    await hass.async_block_till_done()
+    await hass.async_stop()
+
+
+async def _async_measure(config_dir: str) -> dict:
+    """Boot Home Assistant and time how long the ESPuino entities take."""
+    started = time.perf_counter()
+    hass = await _async_boot(config_dir)
+    bootstrap_time = time.perf_counter() - started
+
+    entity_ids = _espuino_entity_ids(hass)
+    players = [entity_id for entity_id in entity_ids if entity_id.startswith("media_player.")]
+    players_ready = sum(hass.states.get(entity_id) is not None for entity_id in players)
+
+    await hass.async_start()
+    complete = await _async_wait_for(
+        lambda: all(hass.states.get(entity_id) is not None for entity_id in entity_ids), ENTITY_TIMEOUT
+    )
+    all_entities_time = time.perf_counter() - started
+    entries = len(hass.config_entries.async_entries(DOMAIN))
+    await hass.async_stop()
+    return {
+        "entries": entries,
+        "entities": len(entity_ids),
+        "players_ready_after_bootstrap": players_ready,
+        "players": len(players),
+        "bootstrap_s": bootstrap_time,
+        "all_entities_s": all_entities_time if complete else None,
+    }
+
+
+def _set_defer(config_dir: str, defer: bool) -> None:
+    """Switch the defer option of all ESPuino entries in the stored config entries."""
+    path = os.path.join(config_dir, ".storage", "core.config_entries")
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    for entry in data["data"]["entries"]:
+        if entry["domain"] == DOMAIN:
+            entry["options"] = {**entry.get("options", {}), CONF_DEFER_PLATFORMS: defer}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+
+
+def _run_child(*args: str) -> dict | None:
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), *args], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:], file=sys.stderr)
+        raise RuntimeError(f"Benchmark step {args[0]} failed")
+    lines = result.stdout.strip().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def benchmark_startup(config_dir: str, entry_counts: list[int], repeat: int) -> None:
+    """Print startup times for the given entry counts, with and without deferred platforms."""
+    print(f"Startup time, median of {repeat} boots")
+    print(
+        f"  {'entries':>7} {'mode':8} {'entities':>8} {'bootstrap s':>11} {'per entry ms':>12}"
+        f" {'players ready':>13} {'all entities s':>14}"
+    )
+    for count in entry_counts:
+        with tempfile.TemporaryDirectory(prefix="espuino_bench_") as work_dir:
+            base = os.path.join(work_dir, "base")
+            shutil.copytree(config_dir, base, ignore=shutil.ignore_patterns("home-assistant_v2.db*", "*.log*"))
+            # Immer den Stand dieses Repositories messen
+            shutil.copytree(
+                os.path.join(REPO_ROOT, "custom_components", DOMAIN),
+                os.path.join(base, "custom_components", DOMAIN),
+                ignore=shutil.ignore_patterns("__pycache__"),
+                dirs_exist_ok=True,
+            )
+            _run_child("_prepare", base, str(count))
+            for defer in (False, True):
+                _set_defer(base, defer)
+                runs = [_run_child("_measure", base) for _ in range(repeat)]
+                bootstrap = statistics.median(run["bootstrap_s"] for run in runs)
+                complete = [run["all_entities_s"] for run in runs if run["all_entities_s"] is not None]
+                all_entities = f"{statistics.median(complete):14.2f}" if complete else f"{'timeout':>14}"
+                # Media Player mit State, wenn der Bootstrap fertig ist (schlechtester Lauf)
+                players_ready = f"{min(run['players_ready_after_bootstrap'] for run in runs)}/{runs[0]['players']}"
+                print(
+                    f"  {runs[0]['entries']:>7} {'deferred' if defer else 'all':8} {runs[0]['entities']:>8}"
+                    f" {bootstrap:11.2f} {bootstrap / max(1, runs[0]['entries']) * 1000:12.1f}"
+                    f" {players_ready:>13} {all_entities}"
+                )
+
+
+def main() -> None:
+    """Command line entry point."""
+    if len(sys.argv) > 1 and sys.argv[1] in ("_prepare", "_measure"):
+        # Kindprozess: ein einzelner Boot, Ergebnis als JSON in der letzten Zeile
+        step, config_dir = sys.argv[1], sys.argv[2]
+        if step == "_prepare":
+            asyncio.run(_async_prepare(config_dir, int(sys.argv[3])))
+        else:
+            print(json.dumps(asyncio.run(_async_measure(config_dir))))
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--config", help="Home Assistant config directory with MQTT set up (copied, not modified)")
+    parser.add_argument("--entries", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--import-only", action="store_true")
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("homeassistant") is None:
+        sys.exit("Home Assistant is not installed in this Python environment")
+    benchmark_imports(max(args.repeat, 5))
+    if args.import_only:
+        return
+    if not args.config:
+        parser.error("--config is required for the startup benchmark")
+    print()
+    benchmark_startup(os.path.expanduser(args.config), args.entries, args.repeat)
+
+
+if __name__ == "__main__":
+    main()